@@ -6,16 +6,16 @@ Fornece uma interface amigável para interação com o agente via browser.
 """
 
 import asyncio
-import json
 import os
-import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
+import orjson
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
@@ -38,13 +38,27 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 from .config_manager import config_manager
-from .session_manager import session_manager, Session
+from .session_manager import get_session_manager, now_iso, ormsgpack, send_message, Session
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia e encerra as tarefas de fundo da aplicação."""
+    manager = get_session_manager()
+    manager.start()
+    try:
+        yield
+    finally:
+        await manager.stop()
+
 
 # Application setup
 app = FastAPI(
     title="Otomanus",
     description="Interface web para o agente Otomanus - Um assistente de IA de propósito geral",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -63,45 +77,6 @@ templates_path = Path(__file__).parent / "templates"
 app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
 templates = Jinja2Templates(directory=str(templates_path))
 
-# Session management
-class SessionManager:
-    """Gerencia sessões de chat com o agente."""
-    
-    def __init__(self):
-        self.sessions: Dict[str, dict] = {}
-        self.agents: Dict[str, Manus] = {}
-        self.websockets: Dict[str, List[WebSocket]] = {}
-        self.tasks: Dict[str, asyncio.Task] = {}
-    
-    def create_session(self) -> str:
-        """Cria uma nova sessão."""
-        session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
-            "id": session_id,
-            "created_at": datetime.now().isoformat(),
-            "status": "idle",
-            "messages": [],
-            "thinking_steps": [],
-            "files": []
-        }
-        self.websockets[session_id] = []
-        return session_id
-    
-    def get_session(self, session_id: str) -> Optional[dict]:
-        """Obtém uma sessão pelo ID."""
-        return self.sessions.get(session_id)
-    
-    async def broadcast(self, session_id: str, message: dict):
-        """Envia mensagem para todos os WebSockets conectados à sessão."""
-        if session_id in self.websockets:
-            for ws in self.websockets[session_id]:
-                try:
-                    await ws.send_json(message)
-                except Exception as e:
-                    logger.error(f"Erro ao enviar mensagem WebSocket: {e}")
-
-session_manager = SessionManager()
-
 
 # Pydantic models
 class ChatRequest(BaseModel):
@@ -137,174 +112,306 @@ async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+# Corpo do health check, regenerado no máximo uma vez por segundo
+_health_cache = ("", b"")
+
+
+def _health_payload() -> bytes:
+    """Retorna o corpo do health check, com o timestamp atualizado por segundo."""
+    global _health_cache
+    timestamp = now_iso()
+    if timestamp != _health_cache[0]:
+        _health_cache = (timestamp, orjson.dumps({
+            "status": "healthy",
+            "timestamp": timestamp
+        }))
+    return _health_cache[1]
+
+
 @app.get("/api/health")
 async def health_check():
     """Verificação de saúde da aplicação."""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return Response(content=_health_payload(), media_type="application/json")
 
 
 # Chat endpoints
-@app.post("/api/chat")
-async def create_chat(request: ChatRequest):
-    """Cria uma nova sessão de chat ou continua uma existente."""
-    session_id = request.session_id or session_manager.create_session()
-    session = session_manager.get_session(session_id)
-    
+async def _handle_chat(prompt: str, session_id: Optional[str] = None) -> dict:
+    """Registra o prompt na sessão e inicia o agente em segundo plano."""
+    manager = get_session_manager()
+    session = None
+    if session_id:
+        session = manager.get_session(session_id)
+        if session:
+            # Sessão carregada do disco: este worker passa a ser o dono
+            manager.claim_session(session_id)
     if not session:
-        session_id = session_manager.create_session()
-        session = session_manager.get_session(session_id)
+        session = manager.create_session()
+    session_id = session.id
     
     # Add user message
-    session["messages"].append({
-        "role": "user",
-        "content": request.prompt,
-        "timestamp": datetime.now().isoformat()
-    })
-    session["status"] = "processing"
+    session.add_message("user", prompt)
+    session.set_status("processing")
+    manager.update_session(session)
     
     # Start agent task
     async def run_agent():
         try:
             agent = await Manus.create()
-            session_manager.agents[session_id] = agent
+            session.agent = agent
             
             # Broadcast status update
-            await session_manager.broadcast(session_id, {
+            await manager.broadcast(session_id, {
                 "type": "status",
                 "status": "processing",
                 "message": "Processando sua solicitação..."
             })
             
             # Run agent
-            result = await agent.run(request.prompt)
+            result = await agent.run(prompt)
             
             # Add assistant response
-            session["messages"].append({
-                "role": "assistant",
-                "content": result,
-                "timestamp": datetime.now().isoformat()
-            })
-            session["status"] = "completed"
+            session.add_message("assistant", result)
+            session.set_status("completed")
+            manager.update_session(session)
             
             # Broadcast completion
-            await session_manager.broadcast(session_id, {
+            await manager.broadcast(session_id, {
                 "type": "complete",
                 "result": result
             })
             
         except Exception as e:
             logger.error(f"Erro ao executar agente: {e}")
-            session["status"] = "error"
-            session["error"] = str(e)
-            await session_manager.broadcast(session_id, {
+            session.set_status("error", str(e))
+            manager.update_session(session)
+            await manager.broadcast(session_id, {
                 "type": "error",
                 "message": str(e)
             })
         finally:
-            if session_id in session_manager.agents:
-                await session_manager.agents[session_id].cleanup()
-                del session_manager.agents[session_id]
+            if session.agent is not None:
+                await session.agent.cleanup()
+                session.agent = None
     
     # Create and store task
-    task = asyncio.create_task(run_agent())
-    session_manager.tasks[session_id] = task
+    manager.start_task(session, run_agent())
     
     return {"session_id": session_id, "status": "processing"}
 
 
+@app.post("/api/chat")
+async def create_chat(request: ChatRequest):
+    """Cria uma nova sessão de chat ou continua uma existente."""
+    if request.session_id and await get_session_manager().remote_owner(request.session_id):
+        raise HTTPException(status_code=409, detail="Sessão gerenciada por outro worker")
+    return await _handle_chat(request.prompt, request.session_id)
+
+
 @app.get("/api/chat/{session_id}")
 async def get_chat(session_id: str):
     """Obtém o status e mensagens de uma sessão."""
-    session = session_manager.get_session(session_id)
+    manager = get_session_manager()
+    if await manager.remote_owner(session_id):
+        # Lê o snapshot do dono sem manter uma cópia local desatualizada
+        session = manager.load_snapshot(session_id)
+    else:
+        session = manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Sessão não encontrada")
-    return session
+    return session.to_dict()
 
 
 @app.post("/api/chat/{session_id}/stop")
 async def stop_chat(session_id: str):
     """Para a execução de uma sessão."""
-    if session_id in session_manager.tasks:
-        session_manager.tasks[session_id].cancel()
-        del session_manager.tasks[session_id]
-    
-    if session_id in session_manager.agents:
-        await session_manager.agents[session_id].cleanup()
-        del session_manager.agents[session_id]
-    
-    session = session_manager.get_session(session_id)
+    manager = get_session_manager()
+    if await manager.remote_owner(session_id):
+        raise HTTPException(status_code=409, detail="Sessão gerenciada por outro worker")
+    session = manager.get_session(session_id)
     if session:
-        session["status"] = "stopped"
+        await manager.cancel_task(session)
+        
+        if session.agent is not None:
+            await session.agent.cleanup()
+            session.agent = None
+        
+        session.set_status("stopped")
+        manager.update_session(session)
     
     return {"status": "stopped"}
 
 
 # WebSocket endpoint
+# Limites para agrupar frames que chegam em rajada
+WS_BATCH_MAX_FRAMES = 32
+WS_BATCH_WINDOW = 0.001
+
+
+async def _receive_message(websocket: WebSocket) -> dict:
+    """Recebe um frame JSON (texto) ou msgpack (binário) e o decodifica."""
+    frame = await websocket.receive()
+    if frame["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+    
+    if frame.get("text") is not None:
+        return orjson.loads(frame["text"])
+    
+    # Clientes que enviam msgpack passam a receber msgpack
+    if ormsgpack is None:
+        return orjson.loads(frame["bytes"])
+    websocket.state.msgpack = True
+    return ormsgpack.unpackb(frame["bytes"])
+
+
+async def _receive_batch(websocket: WebSocket):
+    """Aguarda uma mensagem e agrega as que chegarem logo em seguida.
+    
+    Retorna as mensagens recebidas e se o cliente desconectou durante a coleta.
+    """
+    messages = [await _receive_message(websocket)]
+    
+    while len(messages) < WS_BATCH_MAX_FRAMES:
+        try:
+            messages.append(
+                await asyncio.wait_for(_receive_message(websocket), WS_BATCH_WINDOW)
+            )
+        except asyncio.TimeoutError:
+            break
+        except WebSocketDisconnect:
+            return messages, True
+    
+    return messages, False
+
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket para comunicação em tempo real."""
     await websocket.accept()
     
-    session = session_manager.get_session(session_id)
+    manager = get_session_manager()
+    remote = await manager.remote_owner(session_id) is not None
+    if remote:
+        # Sessão de outro worker: este socket só recebe os broadcasts via Redis
+        session = manager.attach_remote_session(session_id)
+    else:
+        session = manager.get_session(session_id)
+    
     if not session:
         await websocket.close(code=4004, reason="Sessão não encontrada")
         return
     
-    session_manager.websockets[session_id].append(websocket)
+    session.websockets.append(websocket)
     
     try:
-        while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+        closed = False
+        while not closed:
+            messages, closed = await _receive_batch(websocket)
+            
+            chats = []
+            ping = False
+            for message in messages:
+                if message.get("type") == "ping":
+                    ping = True
+                elif message.get("type") == "chat":
+                    chats.append(message["content"])
+            
+            if ping and not closed:
+                await send_message(websocket, {"type": "pong"})
             
-            if message.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
-            elif message.get("type") == "chat":
-                # Handle chat message
-                request = ChatRequest(prompt=message["content"], session_id=session_id)
-                await create_chat(request)
+            # Chats só podem ser processados pelo worker dono da sessão
+            if chats and remote:
+                if not closed:
+                    await send_message(websocket, {
+                        "type": "error",
+                        "message": "Sessão gerenciada por outro worker"
+                    })
+            elif chats:
+                await asyncio.gather(*(_handle_chat(prompt, session_id) for prompt in chats))
     
     except WebSocketDisconnect:
-        session_manager.websockets[session_id].remove(websocket)
+        pass
     except Exception as e:
         logger.error(f"Erro WebSocket: {e}")
-        session_manager.websockets[session_id].remove(websocket)
+    finally:
+        # O broadcast pode já ter removido um socket morto
+        if websocket in session.websockets:
+            session.websockets.remove(websocket)
+        if remote:
+            manager.detach_remote_session(session)
+
+
+def _walk_files(root: str, prefix: str = ""):
+    """Percorre o diretório com os.scandir, gerando um registro por arquivo."""
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
+    
+    for entry in entries:
+        rel_path = prefix + entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(entry.path, rel_path + os.sep)
+            elif entry.is_file():
+                st = entry.stat()
+                yield {
+                    "name": entry.name,
+                    "path": rel_path,
+                    "size": st.st_size,
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
+                }
+        except OSError:
+            continue
+
+
+def _ndjson(records):
+    """Serializa registros como JSON delimitado por linhas."""
+    for record in records:
+        yield orjson.dumps(record) + b"\n"
 
 
 # Files endpoints
 @app.get("/api/files")
 async def list_files():
-    """Lista arquivos no workspace."""
-    files = []
-    workspace = WORKSPACE_ROOT
-    
-    if workspace.exists():
-        for item in workspace.rglob("*"):
-            if item.is_file():
-                files.append({
-                    "name": item.name,
-                    "path": str(item.relative_to(workspace)),
-                    "size": item.stat().st_size,
-                    "modified": datetime.fromtimestamp(item.stat().st_mtime).isoformat()
-                })
-    
-    return {"files": files, "workspace": str(workspace)}
+    """Lista arquivos no workspace como NDJSON (um arquivo por linha)."""
+    return StreamingResponse(
+        _ndjson(_walk_files(str(WORKSPACE_ROOT))),
+        media_type="application/x-ndjson"
+    )
+
+
+# Bytes inspecionados para distinguir arquivos de texto de binários
+TEXT_SNIFF_BYTES = 8192
+
+
+def _looks_binary(path: Path) -> bool:
+    """Verifica se o início do arquivo contém bytes nulos."""
+    with open(path, "rb") as f:
+        return b"\x00" in f.read(TEXT_SNIFF_BYTES)
 
 
 @app.get("/api/files/{file_path:path}")
 async def get_file(file_path: str):
     """Obtém o conteúdo de um arquivo."""
-    full_path = WORKSPACE_ROOT / file_path
+    workspace = WORKSPACE_ROOT.resolve()
+    full_path = (workspace / file_path).resolve()
+    
+    if not full_path.is_relative_to(workspace):
+        raise HTTPException(status_code=403, detail="Acesso negado")
     
-    if not full_path.exists():
+    if not await asyncio.to_thread(full_path.exists):
         raise HTTPException(status_code=404, detail="Arquivo não encontrado")
     
-    if not full_path.is_file():
+    if not await asyncio.to_thread(full_path.is_file):
         raise HTTPException(status_code=400, detail="Caminho não é um arquivo")
     
     # Check if it's a text file
+    if await asyncio.to_thread(_looks_binary, full_path):
+        return FileResponse(str(full_path))
+    
     try:
-        content = full_path.read_text(encoding="utf-8")
+        content = await asyncio.to_thread(full_path.read_text, encoding="utf-8")
         return {"content": content, "type": "text"}
     except UnicodeDecodeError:
         return FileResponse(str(full_path))
@@ -315,7 +422,8 @@ async def get_file(file_path: str):
 async def get_config():
     """Obtém a configuração atual."""
     # Use config_manager for configuration
-    cfg = config_manager.load_config()
+    cfg = await asyncio.to_thread(config_manager.load_config)
+    mcp_servers = await asyncio.to_thread(config_manager.get_mcp_servers)
     
     return {
         "llm": cfg.get("llm", {
@@ -332,7 +440,7 @@ async def get_config():
             "engine": "Google"
         }),
         "mcp": {
-            "servers": config_manager.get_mcp_servers()
+            "servers": mcp_servers
         },
         "workspace": str(WORKSPACE_ROOT)
     }
@@ -349,20 +457,24 @@ async def update_config(update: ConfigUpdate):
     }
 
 
+# Respostas estáticas serializadas uma única vez
+_MODELS_JSON = orjson.dumps({
+    "models": [
+        {"id": "gpt-4o", "name": "GPT-4o", "provider": "OpenAI"},
+        {"id": "gpt-4o-mini", "name": "GPT-4o Mini", "provider": "OpenAI"},
+        {"id": "gpt-4-turbo", "name": "GPT-4 Turbo", "provider": "OpenAI"},
+        {"id": "claude-3-opus-20240229", "name": "Claude 3 Opus", "provider": "Anthropic"},
+        {"id": "claude-3-sonnet-20240229", "name": "Claude 3 Sonnet", "provider": "Anthropic"},
+        {"id": "claude-3-haiku-20240307", "name": "Claude 3 Haiku", "provider": "Anthropic"},
+        {"id": "llama3.2", "name": "Llama 3.2", "provider": "Ollama"},
+    ]
+})
+
+
 @app.get("/api/config/llm/models")
 async def get_available_models():
     """Lista modelos LLM disponíveis."""
-    return {
-        "models": [
-            {"id": "gpt-4o", "name": "GPT-4o", "provider": "OpenAI"},
-            {"id": "gpt-4o-mini", "name": "GPT-4o Mini", "provider": "OpenAI"},
-            {"id": "gpt-4-turbo", "name": "GPT-4 Turbo", "provider": "OpenAI"},
-            {"id": "claude-3-opus-20240229", "name": "Claude 3 Opus", "provider": "Anthropic"},
-            {"id": "claude-3-sonnet-20240229", "name": "Claude 3 Sonnet", "provider": "Anthropic"},
-            {"id": "claude-3-haiku-20240307", "name": "Claude 3 Haiku", "provider": "Anthropic"},
-            {"id": "llama3.2", "name": "Llama 3.2", "provider": "Ollama"},
-        ]
-    }
+    return Response(content=_MODELS_JSON, media_type="application/json")
 
 
 # MCP endpoints
@@ -402,10 +514,8 @@ async def remove_mcp_server(server_id: str):
 
 
 # Tools endpoints
-@app.get("/api/tools")
-async def list_tools():
-    """Lista ferramentas disponíveis."""
-    tools = [
+_TOOLS_JSON = orjson.dumps({
+    "tools": [
         {
             "name": "python_execute",
             "description": "Executa código Python",
@@ -443,7 +553,13 @@ async def list_tools():
             "category": "control"
         }
     ]
-    return {"tools": tools}
+})
+
+
+@app.get("/api/tools")
+async def list_tools():
+    """Lista ferramentas disponíveis."""
+    return Response(content=_TOOLS_JSON, media_type="application/json")
 
 
 @app.post("/api/tools/{tool_name}/toggle")
@@ -457,41 +573,84 @@ async def toggle_tool(tool_name: str, enabled: bool = True):
 
 
 # Logs endpoints
-@app.get("/api/logs")
-async def list_logs():
-    """Lista arquivos de log."""
-    logs_dir = PROJECT_ROOT / "logs"
+def _scan_logs(logs_dir: Path) -> List[dict]:
+    """Lista os arquivos de log do diretório."""
     logs = []
     
     if logs_dir.exists():
         for log_file in logs_dir.glob("*.log"):
+            st = log_file.stat()
             logs.append({
                 "name": log_file.name,
-                "size": log_file.stat().st_size,
-                "modified": datetime.fromtimestamp(log_file.stat().st_mtime).isoformat()
+                "size": st.st_size,
+                "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
             })
     
+    return logs
+
+
+@app.get("/api/logs")
+async def list_logs():
+    """Lista arquivos de log."""
+    logs = await asyncio.to_thread(_scan_logs, PROJECT_ROOT / "logs")
     return {"logs": logs}
 
 
+def _read_tail(path: Path, lines: int, block_size: int = 64 * 1024) -> str:
+    """Lê as últimas ``lines`` linhas de um arquivo a partir do final."""
+    if lines <= 0:
+        return ""
+    
+    chunks = []
+    newlines = 0
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0 and newlines <= lines:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    
+    data = b"".join(reversed(chunks))
+    return b"\n".join(data.split(b"\n")[-lines:]).decode("utf-8", errors="replace")
+
+
 @app.get("/api/logs/{log_name}")
 async def get_log(log_name: str, lines: int = 100):
-    """Obtém o conteúdo de um arquivo de log."""
+    """Obtém as últimas linhas de um arquivo de log."""
     log_path = PROJECT_ROOT / "logs" / log_name
     
-    if not log_path.exists():
+    if not await asyncio.to_thread(log_path.exists):
         raise HTTPException(status_code=404, detail="Log não encontrado")
     
-    content = log_path.read_text(encoding="utf-8")
-    log_lines = content.split("\n")
+    content = await asyncio.to_thread(_read_tail, log_path, lines)
     
     return {
         "name": log_name,
-        "content": "\n".join(log_lines[-lines:]),
-        "total_lines": len(log_lines)
+        "content": content
     }
 
 
+@app.get("/api/logs/{log_name}/raw")
+async def download_log(log_name: str):
+    """Envia o arquivo de log completo."""
+    log_path = PROJECT_ROOT / "logs" / log_name
+    
+    if not await asyncio.to_thread(log_path.is_file):
+        raise HTTPException(status_code=404, detail="Log não encontrado")
+    
+    return FileResponse(str(log_path), media_type="text/plain", filename=log_name)
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets"
+    )
@@ -0,0 +1,170 @@
+"""
+Redis Backplane
+===============
+Distribui mensagens de broadcast entre workers via Redis pub/sub.
+"""
+
+import asyncio
+import os
+import secrets
+from typing import Awaitable, Callable, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+try:
+    from app.logger import logger
+except Exception:
+    import logging
+    logger = logging.getLogger(__name__)
+
+
+class RedisBackplane:
+    """Publica broadcasts no Redis e repassa os de outros workers.
+
+    Cada worker assina o padrão ``sess:*`` uma única vez e entrega as
+    mensagens recebidas aos WebSockets locais. As mensagens carregam o
+    identificador do worker de origem para evitar eco. O hash
+    ``otomanus:sessions`` registra qual worker é dono de cada sessão, e a
+    chave ``otomanus:worker:<id>``, renovada periodicamente, indica se esse
+    worker ainda está ativo. As publicações passam por uma fila, enviada em
+    ordem por uma tarefa própria, para que a entrega local não espere o Redis.
+    """
+
+    CHANNEL_PREFIX = "sess:"
+    SESSIONS_KEY = "otomanus:sessions"
+    WORKER_PREFIX = "otomanus:worker:"
+    HEARTBEAT_TTL = 30
+
+    def __init__(self, url: str, deliver: Callable[[str, str], Awaitable[None]]):
+        self.url = url
+        self.worker_id = secrets.token_hex(8)
+        self._deliver = deliver
+        self._redis = aioredis.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._publisher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(
+        cls, deliver: Callable[[str, str], Awaitable[None]]
+    ) -> Optional["RedisBackplane"]:
+        """Cria o backplane se REDIS_URL estiver definida e o cliente instalado."""
+        url = os.environ.get("REDIS_URL")
+        if not url:
+            return None
+        if aioredis is None:
+            logger.warning("REDIS_URL definida, mas o pacote redis não está instalado")
+            return None
+        return cls(url, deliver)
+
+    def publish(self, session_id: str, payload: str):
+        """Enfileira uma mensagem serializada para os demais workers."""
+        self._outbox.put_nowait(
+            (f"{self.CHANNEL_PREFIX}{session_id}", f"{self.worker_id}|{payload}")
+        )
+
+    async def _publish_loop(self):
+        """Envia as mensagens enfileiradas, agrupando as pendentes em um pipeline."""
+        while True:
+            batch = [await self._outbox.get()]
+            while not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for channel, message in batch:
+                        pipe.publish(channel, message)
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"Erro ao publicar no Redis: {e}")
+
+    async def register_session(self, session_id: str):
+        """Registra a sessão no índice compartilhado."""
+        try:
+            await self._redis.hset(self.SESSIONS_KEY, session_id, self.worker_id)
+        except Exception as e:
+            logger.error(f"Erro ao registrar sessão no Redis: {e}")
+
+    async def unregister_session(self, session_id: str):
+        """Remove a sessão do índice compartilhado."""
+        try:
+            await self._redis.hdel(self.SESSIONS_KEY, session_id)
+        except Exception as e:
+            logger.error(f"Erro ao remover sessão do Redis: {e}")
+
+    async def remote_owner(self, session_id: str) -> Optional[str]:
+        """Retorna o worker ativo dono da sessão, se não for este."""
+        try:
+            owner = await self._redis.hget(self.SESSIONS_KEY, session_id)
+            if owner is None:
+                return None
+            owner = owner.decode()
+            if owner == self.worker_id:
+                return None
+            if not await self._redis.exists(f"{self.WORKER_PREFIX}{owner}"):
+                # Dono encerrado: a sessão pode ser assumida por este worker
+                return None
+            return owner
+        except Exception as e:
+            logger.error(f"Erro ao consultar sessão no Redis: {e}")
+            return None
+
+    async def _heartbeat(self):
+        """Mantém a chave que indica que este worker está ativo."""
+        key = f"{self.WORKER_PREFIX}{self.worker_id}"
+        while True:
+            try:
+                await self._redis.set(key, 1, ex=self.HEARTBEAT_TTL)
+            except Exception as e:
+                logger.error(f"Erro ao renovar heartbeat no Redis: {e}")
+            await asyncio.sleep(self.HEARTBEAT_TTL / 3)
+
+    async def _listen(self):
+        """Repassa aos WebSockets locais as mensagens de outros workers."""
+        prefix_len = len(self.CHANNEL_PREFIX)
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+                    async for item in pubsub.listen():
+                        if item["type"] != "pmessage":
+                            continue
+                        origin, _, payload = item["data"].decode().partition("|")
+                        if origin == self.worker_id:
+                            continue
+                        session_id = item["channel"].decode()[prefix_len:]
+                        await self._deliver(session_id, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro na assinatura Redis, reconectando: {e}")
+                await asyncio.sleep(1)
+
+    def start(self):
+        """Inicia a assinatura dos canais de sessão, o envio e o heartbeat."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        if self._publisher is None:
+            self._publisher = asyncio.create_task(self._publish_loop())
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self):
+        """Encerra a assinatura, o envio, o heartbeat e a conexão com o Redis."""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._publisher is not None:
+            self._publisher.cancel()
+            self._publisher = None
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+            try:
+                await self._redis.delete(f"{self.WORKER_PREFIX}{self.worker_id}")
+            except Exception as e:
+                logger.error(f"Erro ao remover heartbeat do Redis: {e}")
+        await self._redis.aclose()
@@ -0,0 +1,175 @@
+"""
+2Q Cache
+========
+Caches de capacidade limitada com política de substituição 2Q.
+"""
+
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Hashable, Iterator, List, Optional
+
+
+class TwoQueueCache:
+    """Mapeamento com política de substituição 2Q.
+
+    Entradas novas entram em ``a1`` (FIFO) e só passam para ``am`` (LRU)
+    quando acessadas de novo por ``hit``. Assim, entradas usadas uma única
+    vez saem primeiro, sem empurrar para fora as realmente quentes. As
+    chaves removidas de ``a1`` ficam por um tempo em ``a1_out``; se
+    voltarem, entram direto em ``am``.
+
+    A remoção não é automática: ``victim`` indica a próxima chave a sair,
+    para que o dono do cache libere os recursos associados. O predicado
+    ``pinned`` recebe um valor e indica se a entrada deve ser pulada.
+    """
+
+    def __init__(self, capacity: int, a1_ratio: float = 0.25, out_ratio: float = 0.5):
+        self.capacity = capacity
+        self.a1_max = max(1, int(capacity * a1_ratio))
+        self.out_max = max(1, int(capacity * out_ratio))
+        self.a1: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.am: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.a1_out: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.a1) + len(self.am)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.am or key in self.a1
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return chain(self.a1, self.am)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        if key in self.am:
+            return self.am[key]
+        return self.a1[key]
+
+    def __setitem__(self, key: Hashable, value: Any):
+        if key in self.am:
+            self.am[key] = value
+        elif key in self.a1:
+            self.a1[key] = value
+        elif key in self.a1_out:
+            # Reacesso após sair de A1: a entrada já provou ser reutilizada
+            del self.a1_out[key]
+            self.am[key] = value
+        else:
+            self.a1[key] = value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtém um valor sem alterar a posição da entrada."""
+        value = self.am.get(key, default)
+        if value is default:
+            value = self.a1.get(key, default)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove uma entrada, lembrando-a em ``a1_out`` se vier de A1."""
+        if key in self.am:
+            return self.am.pop(key)
+        if key in self.a1:
+            self.a1_out[key] = None
+            if len(self.a1_out) > self.out_max:
+                self.a1_out.popitem(last=False)
+            return self.a1.pop(key)
+        return default
+
+    def hit(self, key: Hashable):
+        """Registra um acesso, promovendo a entrada de A1 para Am."""
+        if key in self.am:
+            self.am.move_to_end(key)
+        elif key in self.a1:
+            self.am[key] = self.a1.pop(key)
+
+    def victim(self, pinned: Optional[Callable[[Any], bool]] = None) -> Optional[Hashable]:
+        """Chave que deve sair primeiro quando o cache estiver cheio."""
+        if len(self.a1) > self.a1_max or not self.am:
+            order = chain(self.a1.items(), self.am.items())
+        else:
+            order = chain(self.am.items(), self.a1.items())
+        for key, value in order:
+            if pinned is None or not pinned(value):
+                return key
+        return None
+
+    def overflow(self, pinned: Optional[Callable[[Any], bool]] = None) -> Optional[Hashable]:
+        """Próxima chave a remover, se o cache exceder a capacidade."""
+        if len(self) > self.capacity:
+            return self.victim(pinned)
+        return None
+
+    def keys(self) -> Iterator[Hashable]:
+        return iter(self)
+
+    def values(self) -> Iterator[Any]:
+        return chain(self.a1.values(), self.am.values())
+
+    def items(self) -> Iterator[tuple]:
+        return chain(self.a1.items(), self.am.items())
+
+
+class ShardedCache:
+    """Conjunto de ``TwoQueueCache`` particionado pelo hash da chave.
+
+    Cada chave pertence a um único shard, que aplica a política 2Q sobre
+    sua fração da capacidade. Mantém dicionários menores, com
+    redimensionamentos e reordenações restritos a um shard. O limite
+    ``capacity`` vale para o total de entradas; a vítima sai do shard
+    mais cheio que tenha uma entrada não fixada.
+    """
+
+    def __init__(self, capacity: int, shards: int = 16):
+        count = max(1, min(shards, capacity))
+        per_shard = -(-capacity // count)
+        self.capacity = capacity
+        self.shards: List[TwoQueueCache] = [TwoQueueCache(per_shard) for _ in range(count)]
+
+    def _shard(self, key: Hashable) -> TwoQueueCache:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._shard(key)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return chain.from_iterable(self.shards)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        return self._shard(key)[key]
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self._shard(key)[key] = value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtém um valor sem alterar a posição da entrada."""
+        return self._shard(key).get(key, default)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove uma entrada do seu shard."""
+        return self._shard(key).pop(key, default)
+
+    def hit(self, key: Hashable):
+        """Registra um acesso no shard da chave."""
+        self._shard(key).hit(key)
+
+    def overflow(self, pinned: Optional[Callable[[Any], bool]] = None) -> Optional[Hashable]:
+        """Próxima chave a remover, se o total exceder a capacidade."""
+        if len(self) <= self.capacity:
+            return None
+        for shard in sorted(self.shards, key=len, reverse=True):
+            key = shard.victim(pinned)
+            if key is not None:
+                return key
+        return None
+
+    def keys(self) -> Iterator[Hashable]:
+        return iter(self)
+
+    def values(self) -> Iterator[Any]:
+        return chain.from_iterable(shard.values() for shard in self.shards)
+
+    def items(self) -> Iterator[tuple]:
+        return chain.from_iterable(shard.items() for shard in self.shards)
@@ -4,11 +4,12 @@ Configuration Manager
 Gerencia configurações dinâmicas do Otomanus via interface web.
 """
 
-import json
 import os
+import tomllib
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+import orjson
 import toml
 
 try:
@@ -26,6 +27,8 @@ class ConfigManager:
         self.mcp_file = self.config_dir / "mcp.json"
         self._config_cache: Optional[Dict] = None
         self._mcp_cache: Optional[Dict] = None
+        self._config_mtime_ns: Optional[int] = -1
+        self._mcp_mtime_ns: Optional[int] = -1
     
     def _ensure_config_dir(self):
         """Garante que o diretório de configuração existe."""
@@ -33,18 +36,25 @@ class ConfigManager:
     
     def load_config(self) -> Dict[str, Any]:
         """Carrega a configuração do arquivo TOML."""
-        if self._config_cache is not None:
+        try:
+            mtime_ns = self.config_file.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        
+        # Só reprocessa o arquivo quando ele muda no disco
+        if self._config_cache is not None and mtime_ns == self._config_mtime_ns:
             return self._config_cache
         
-        if self.config_file.exists():
+        if mtime_ns is not None:
             try:
-                self._config_cache = toml.load(self.config_file)
+                self._config_cache = tomllib.loads(self.config_file.read_bytes().decode("utf-8"))
             except Exception as e:
                 print(f"Erro ao carregar config.toml: {e}")
                 self._config_cache = self._get_default_config()
         else:
             self._config_cache = self._get_default_config()
         
+        self._config_mtime_ns = mtime_ns
         return self._config_cache
     
     def save_config(self, config: Dict[str, Any]) -> bool:
@@ -54,6 +64,7 @@ class ConfigManager:
             with open(self.config_file, "w") as f:
                 toml.dump(config, f)
             self._config_cache = config
+            self._config_mtime_ns = self.config_file.stat().st_mtime_ns
             return True
         except Exception as e:
             print(f"Erro ao salvar config.toml: {e}")
@@ -76,28 +87,34 @@ class ConfigManager:
     
     def load_mcp_config(self) -> Dict[str, Any]:
         """Carrega a configuração MCP do arquivo JSON."""
-        if self._mcp_cache is not None:
+        try:
+            mtime_ns = self.mcp_file.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        
+        # Só reprocessa o arquivo quando ele muda no disco
+        if self._mcp_cache is not None and mtime_ns == self._mcp_mtime_ns:
             return self._mcp_cache
         
-        if self.mcp_file.exists():
+        if mtime_ns is not None:
             try:
-                with open(self.mcp_file, "r") as f:
-                    self._mcp_cache = json.load(f)
+                self._mcp_cache = orjson.loads(self.mcp_file.read_bytes())
             except Exception as e:
                 print(f"Erro ao carregar mcp.json: {e}")
                 self._mcp_cache = self._get_default_mcp_config()
         else:
             self._mcp_cache = self._get_default_mcp_config()
         
+        self._mcp_mtime_ns = mtime_ns
         return self._mcp_cache
     
     def save_mcp_config(self, config: Dict[str, Any]) -> bool:
         """Salva a configuração MCP no arquivo JSON."""
         try:
             self._ensure_config_dir()
-            with open(self.mcp_file, "w") as f:
-                json.dump(config, f, indent=2)
+            self.mcp_file.write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
             self._mcp_cache = config
+            self._mcp_mtime_ns = self.mcp_file.stat().st_mtime_ns
             return True
         except Exception as e:
             print(f"Erro ao salvar mcp.json: {e}")
@@ -195,6 +212,8 @@ class ConfigManager:
         """Invalida o cache de configuração."""
         self._config_cache = None
         self._mcp_cache = None
+        self._config_mtime_ns = -1
+        self._mcp_mtime_ns = -1
 
 
 # Singleton instance
@@ -5,12 +5,38 @@ Gerencia sessões de chat com persistência e histórico.
 """
 
 import asyncio
-import json
-import uuid
+import heapq
+import mmap
+import os
+import re
+import secrets
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import orjson
+from sortedcontainers import SortedList
+
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: locks de região via msvcrt
+    fcntl = None
+    import msvcrt
+
+from .backplane import RedisBackplane
+from .cache import ShardedCache
+
 try:
     from app.config import PROJECT_ROOT
     from app.logger import logger
@@ -20,63 +46,241 @@ except Exception:
     logger = logging.getLogger(__name__)
 
 
+# Atalhos para funções chamadas a cada mutação de sessão
+_now = time.time
+_monotonic = time.monotonic
+_fromtimestamp = datetime.fromtimestamp
+
+# Timestamp ISO do segundo corrente, reaproveitado entre chamadas
+_iso_cache = (0, "")
+
+
+def now_iso() -> str:
+    """Retorna o horário atual em ISO 8601, com resolução de um segundo."""
+    global _iso_cache
+    now = int(_now())
+    if now != _iso_cache[0]:
+        _iso_cache = (now, _fromtimestamp(now).isoformat())
+    return _iso_cache[1]
+
+
+def _iso(timestamp: float) -> str:
+    """Formata um timestamp epoch como ISO 8601."""
+    return _fromtimestamp(timestamp).isoformat()
+
+
+def _epoch(value: Any) -> float:
+    """Converte um timestamp persistido (epoch ou ISO 8601) para epoch."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+# Papéis de mensagem formam um conjunto pequeno; cada um existe uma única vez
+_ROLES = {role: sys.intern(role) for role in ("user", "assistant", "system", "tool")}
+
+
+def _intern_role(role: str) -> str:
+    """Retorna a instância compartilhada da string do papel."""
+    return _ROLES.get(role) or sys.intern(role)
+
+
+def _try_lock(f) -> bool:
+    """Tenta obter, sem bloquear, o lock exclusivo de um arquivo aberto."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+# Só o início de cada mensagem entra no índice de busca
+SEARCH_INDEX_CHARS = 2000
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokens(content: str) -> set:
+    """Tokens indexados de uma mensagem, em minúsculas."""
+    return set(_TOKEN_RE.findall(content[:SEARCH_INDEX_CHARS].lower()))
+
+
+def wants_msgpack(websocket) -> bool:
+    """Indica se o cliente do WebSocket negociou frames msgpack."""
+    return getattr(websocket.state, "msgpack", False)
+
+
+async def send_message(websocket, message: dict):
+    """Envia uma mensagem no formato negociado pelo cliente."""
+    if wants_msgpack(websocket):
+        await websocket.send_bytes(ormsgpack.packb(message))
+    else:
+        await websocket.send_text(orjson.dumps(message).decode())
+
+
+@dataclass(slots=True)
+class Message:
+    """Mensagem de uma sessão de chat.
+    
+    Serializada diretamente pelo orjson, com as mesmas chaves do formato
+    persistido.
+    """
+    id: str
+    role: str
+    content: str
+    timestamp: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Message":
+        """Cria uma mensagem a partir de um dicionário."""
+        return cls(
+            id=data["id"],
+            role=_intern_role(data["role"]),
+            content=data["content"],
+            timestamp=data["timestamp"],
+            metadata=data.get("metadata") or {}
+        )
+
+
 class Session:
     """Representa uma sessão de chat."""
     
+    __slots__ = (
+        "id", "created_at", "updated_at", "status", "messages",
+        "thinking_steps", "files", "metadata", "error",
+        "preview", "message_count", "_msg_counter", "seq", "_ops",
+        "_created_iso", "_updated_iso", "_dict_cache",
+        "websockets", "agent", "task", "out_queue", "writer", "last_touch",
+        "_manager"
+    )
+    
     def __init__(self, session_id: Optional[str] = None):
-        self.id = session_id or str(uuid.uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.id = session_id or secrets.token_hex(16)
+        self.created_at = _now()
+        self.updated_at = self.created_at
         self.status = "idle"  # idle, processing, completed, error, stopped
-        self.messages: List[Dict[str, Any]] = []
+        self.messages: List[Message] = []
         self.thinking_steps: List[Dict[str, Any]] = []
         self.files: List[str] = []
         self.metadata: Dict[str, Any] = {}
         self.error: Optional[str] = None
+        # Resumo usado na listagem, mantido por add_message
+        self.preview = ""
+        self.message_count = 0
+        # Contador dos IDs de mensagens e passos de pensamento
+        self._msg_counter = 0
+        # Número da última alteração; ordena os registros do log na reaplicação
+        self.seq = 0
+        # Operações ainda não registradas no log de escrita antecipada
+        self._ops: List[Dict[str, Any]] = []
+        # Formatos ISO em cache, indexados pelo timestamp de origem
+        self._created_iso = (None, "")
+        self._updated_iso = (None, "")
+        # Resultado de to_dict, descartado a cada alteração
+        self._dict_cache: Optional[Dict[str, Any]] = None
+        
+        # Recursos em execução (não persistidos)
+        self.websockets: List[Any] = []
+        self.agent: Optional[Any] = None
+        self.task: Optional[asyncio.Task] = None
+        self.out_queue: Optional[asyncio.Queue] = None
+        self.writer: Optional[asyncio.Task] = None
+        self.last_touch = _monotonic()
+        self._manager: Optional["SessionManager"] = None
+    
+    def _mark_updated(self):
+        """Atualiza ``updated_at`` e notifica o gerenciador."""
+        previous = self.updated_at
+        self.updated_at = _now()
+        self.seq += 1
+        self._dict_cache = None
+        if self._manager is not None:
+            self._manager._on_updated(self, previous)
     
-    def add_message(self, role: str, content: str, metadata: Optional[Dict] = None):
+    @property
+    def created_iso(self) -> str:
+        """``created_at`` no formato ISO."""
+        if self._created_iso[0] != self.created_at:
+            self._created_iso = (self.created_at, _iso(self.created_at))
+        return self._created_iso[1]
+    
+    @property
+    def updated_iso(self) -> str:
+        """``updated_at`` no formato ISO."""
+        if self._updated_iso[0] != self.updated_at:
+            self._updated_iso = (self.updated_at, _iso(self.updated_at))
+        return self._updated_iso[1]
+    
+    def _next_id(self) -> str:
+        """Gera um ID globalmente único para mensagens e passos desta sessão."""
+        self._msg_counter += 1
+        return f"{self.id}-{self._msg_counter}"
+    
+    def add_message(self, role: str, content: str, metadata: Optional[Dict] = None) -> Message:
         """Adiciona uma mensagem à sessão."""
-        message = {
-            "id": str(uuid.uuid4()),
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {}
-        }
+        message = Message(
+            self._next_id(), _intern_role(role), content, now_iso(), metadata or {}
+        )
         self.messages.append(message)
-        self.updated_at = datetime.now()
+        if not self.message_count:
+            self.preview = content[:100]
+        self.message_count += 1
+        if self._manager is not None:
+            self._manager._on_message(self, message)
+        self._mark_updated()
+        self._ops.append({"op": "msg", "seq": self.seq, "ts": self.updated_at, "msg": message})
         return message
     
     def add_thinking_step(self, step: str, tool: Optional[str] = None):
         """Adiciona um passo de pensamento."""
         thinking = {
-            "id": str(uuid.uuid4()),
+            "id": self._next_id(),
             "step": step,
             "tool": tool,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
         self.thinking_steps.append(thinking)
-        self.updated_at = datetime.now()
+        self._mark_updated()
+        self._ops.append({"op": "step", "seq": self.seq, "ts": self.updated_at, "step": thinking})
         return thinking
     
     def set_status(self, status: str, error: Optional[str] = None):
         """Define o status da sessão."""
+        previous = self.status
         self.status = status
         self.error = error
-        self.updated_at = datetime.now()
+        if self._manager is not None:
+            self._manager._on_status(self, previous)
+        self._mark_updated()
+        self._ops.append({
+            "op": "status", "seq": self.seq, "ts": self.updated_at,
+            "status": status, "error": error
+        })
     
     def add_file(self, file_path: str):
         """Adiciona um arquivo à sessão."""
         if file_path not in self.files:
             self.files.append(file_path)
-            self.updated_at = datetime.now()
+            self._mark_updated()
+            self._ops.append({
+                "op": "file", "seq": self.seq, "ts": self.updated_at, "path": file_path
+            })
     
     def to_dict(self) -> Dict[str, Any]:
-        """Converte a sessão para dicionário."""
-        return {
+        """Converte a sessão para dicionário.
+        
+        O resultado é reaproveitado até a próxima alteração da sessão e
+        não deve ser modificado por quem o recebe.
+        """
+        if self._dict_cache is not None:
+            return self._dict_cache
+        self._dict_cache = {
             "id": self.id,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
+            "created_at": self.created_iso,
+            "updated_at": self.updated_iso,
             "status": self.status,
             "messages": self.messages,
             "thinking_steps": self.thinking_steps,
@@ -84,129 +288,1015 @@ class Session:
             "metadata": self.metadata,
             "error": self.error
         }
+        return self._dict_cache
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Session":
         """Cria uma sessão a partir de um dicionário."""
         session = cls(session_id=data["id"])
-        session.created_at = datetime.fromisoformat(data["created_at"])
-        session.updated_at = datetime.fromisoformat(data["updated_at"])
+        session.created_at = _epoch(data["created_at"])
+        session.updated_at = _epoch(data["updated_at"])
         session.status = data["status"]
-        session.messages = data["messages"]
+        session.messages = [Message.from_dict(m) for m in data["messages"]]
+        session.message_count = len(session.messages)
+        if session.messages:
+            session.preview = session.messages[0].content[:100]
+        session._msg_counter = len(session.messages) + len(data["thinking_steps"])
         session.thinking_steps = data["thinking_steps"]
         session.files = data["files"]
         session.metadata = data.get("metadata", {})
         session.error = data.get("error")
+        session.seq = data.get("seq", 0)
         return session
+    
+    def apply_op(self, record: Dict[str, Any], seen: set) -> bool:
+        """Reaplica uma operação lida do log de escrita antecipada.
+        
+        Registros com ``seq`` até o da sessão já estão nela e são ignorados,
+        assim como mensagens e passos cujo ID já está em ``seen``; o log pode
+        ser reaplicado sobre um snapshot mais novo sem desfazer alterações.
+        Retorna se o registro foi aplicado.
+        """
+        seq = record.get("seq")
+        if seq is not None:
+            if seq <= self.seq:
+                return False
+            self.seq = seq
+        elif record["ts"] < self.updated_at:
+            # Registro legado, sem seq: ordena pelo timestamp
+            return False
+        
+        op = record["op"]
+        if op == "msg":
+            message = Message.from_dict(record["msg"])
+            if message.id not in seen:
+                seen.add(message.id)
+                self.messages.append(message)
+                self._msg_counter += 1
+                if not self.message_count:
+                    self.preview = message.content[:100]
+                self.message_count += 1
+        elif op == "step":
+            step = record["step"]
+            if step["id"] not in seen:
+                seen.add(step["id"])
+                self.thinking_steps.append(step)
+                self._msg_counter += 1
+        elif op == "status":
+            self.status = record["status"]
+            self.error = record["error"]
+        elif op == "file":
+            if record["path"] not in self.files:
+                self.files.append(record["path"])
+        self.updated_at = record["ts"]
+        self._dict_cache = None
+        return True
+
+
+@dataclass(slots=True)
+class SessionSummary:
+    """Resumo de uma sessão persistida que não está em memória.
+    
+    Mantém listagem, estatísticas e limpeza cobrindo todas as sessões sem
+    guardar as mensagens das que saíram do cache.
+    """
+    id: str
+    created_at: float
+    updated_at: float
+    status: str
+    message_count: int
+    preview: str
+    
+    @classmethod
+    def of(cls, session: Session) -> "SessionSummary":
+        """Cria o resumo de uma sessão."""
+        return cls(
+            session.id, session.created_at, session.updated_at,
+            session.status, session.message_count, session.preview
+        )
+    
+    @property
+    def created_iso(self) -> str:
+        return _iso(self.created_at)
+    
+    @property
+    def updated_iso(self) -> str:
+        return _iso(self.updated_at)
 
 
 class SessionManager:
-    """Gerencia sessões de chat."""
+    """Gerencia sessões de chat.
+    
+    As sessões em memória ficam em um cache 2Q particionado, limitado a
+    ``max_sessions``; sessões ociosas por mais de ``idle_ttl`` segundos são
+    liberadas por uma tarefa de fundo e recarregadas do disco quando
+    acessadas novamente. Listagem, busca, estatísticas e limpeza usam um
+    índice de todas as sessões conhecidas, que sobrevive a essa remoção.
+    """
     
-    def __init__(self, persist: bool = True):
-        self.sessions: Dict[str, Session] = {}
+    # Tamanho a partir do qual os snapshots são lidos via mmap
+    MMAP_THRESHOLD = 64 * 1024
+    
+    def __init__(
+        self,
+        persist: bool = True,
+        max_sessions: int = 10_000,
+        idle_ttl: float = 60 * 60,
+        sweep_interval: float = 60,
+        coalesce_window: float = 0.01,
+        flush_interval: float = 0.2,
+        compact_every: int = 1000
+    ):
+        # Cache 2Q particionado em 16 shards pelo hash do ID
+        self.sessions = ShardedCache(max_sessions, shards=16)
+        # Todas as sessões conhecidas: a própria Session se estiver em memória,
+        # senão seu SessionSummary
+        self._summaries: Dict[str, "Session | SessionSummary"] = {}
+        # Índice (-updated_at, id) das sessões conhecidas, da mais recente à mais antiga
+        self._by_updated = SortedList()
+        # Índice invertido token -> IDs das sessões conhecidas que o contêm.
+        # Cobre também as sessões fora da memória, para que a busca não leia o
+        # disco inteiro: cresce com o vocabulário e o número de sessões
+        # persistidas, não com max_sessions.
+        self._tokens: Dict[str, set] = defaultdict(set)
+        # Vocabulário ordenado, direto e invertido, para buscas por prefixo e sufixo
+        self._vocab = SortedList()
+        self._vocab_reversed = SortedList()
+        # Sessões com mensagens maiores que a parte indexada
+        self._unindexed: set = set()
+        # Estatísticas das sessões conhecidas, mantidas a cada alteração
+        self._status_counts: Counter = Counter()
+        self._total_messages = 0
         self.persist = persist
         self.sessions_dir = PROJECT_ROOT / "sessions"
+        # Log de escrita antecipada deste worker. Cada processo tem o seu, para
+        # que a compactação de um worker não descarte registros de outro.
+        self.wal_path = self.sessions_dir / f"wal-{os.getpid()}.log"
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.coalesce_window = coalesce_window
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self._sweeper: Optional[asyncio.Task] = None
+        # Registros do log aguardando gravação pelo flusher
+        self._wal_buffer: List[bytes] = []
+        self._wal_records = 0
+        self._wal: Optional[Any] = None
+        # Lock mantido enquanto este worker estiver ativo; indica aos demais
+        # que o log ainda está em uso
+        self._wal_lock: Optional[Any] = None
+        # Sessões cujo snapshot está desatualizado em relação ao log
+        self._dirty: Dict[str, Session] = {}
+        # Sessões removidas cujo snapshot deve sumir na compactação
+        self._deleted: set = set()
+        # Snapshots que falharam e serão regravados na próxima compactação
+        self._failed_snapshots: Dict[str, bytes] = {}
+        # Snapshots de sessões removidas que não puderam ser apagados
+        self._failed_deletes: set = set()
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._background: set = set()
+        self.backplane = RedisBackplane.from_env(self._deliver)
+        # Sessões de outros workers com WebSockets conectados aqui
+        self._remote: Dict[str, Session] = {}
         
         if self.persist:
             self._ensure_sessions_dir()
+            self._wal_lock = open(self.wal_path.with_suffix(".lock"), "ab")
+            if not _try_lock(self._wal_lock):
+                logger.error(f"Lock de {self.wal_path.name} já está em uso")
             self._load_sessions()
+            self._wal = open(self.wal_path, "ab", buffering=0)
+    
+    def _wal_files(self) -> List[Path]:
+        """Logs presentes no diretório, do mais antigo ao mais recente."""
+        files = [
+            path for path in self.sessions_dir.glob("wal*.log") if path.is_file()
+        ]
+        return sorted(files, key=lambda path: path.stat().st_mtime)
+    
+    @staticmethod
+    def _worker_alive(wal_file: Path) -> bool:
+        """Indica se o worker dono do log ainda está em execução.
+        
+        Cada worker mantém o lock de ``wal-<pid>.lock`` enquanto roda; o
+        sistema o libera quando o processo termina, mesmo após uma queda, e
+        um PID reaproveitado não herda o lock.
+        """
+        lock_file = wal_file.with_suffix(".lock")
+        if not lock_file.exists():
+            # Log legado, anterior ao lock por worker
+            return False
+        try:
+            with open(lock_file, "ab") as f:
+                return not _try_lock(f)
+        except OSError as e:
+            logger.error(f"Erro ao verificar lock de {wal_file.name}: {e}")
+            return True
     
     def _ensure_sessions_dir(self):
         """Garante que o diretório de sessões existe."""
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
     
+    def _load_one(self, session_file: "str | Path") -> Optional[Session]:
+        """Lê uma sessão persistida.
+        
+        Arquivos acima de ``MMAP_THRESHOLD`` bytes são mapeados em memória e
+        entregues ao orjson sem uma cópia intermediária.
+        """
+        try:
+            with open(session_file, "rb") as f:
+                if os.fstat(f.fileno()).st_size <= self.MMAP_THRESHOLD:
+                    return Session.from_dict(orjson.loads(f.read()))
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view:
+                        data = orjson.loads(view)
+                return Session.from_dict(data)
+        except Exception as e:
+            logger.error(f"Erro ao carregar sessão {session_file}: {e}")
+            return None
+    
     def _load_sessions(self):
         """Carrega sessões persistidas."""
         if not self.sessions_dir.exists():
             return
         
-        for session_file in self.sessions_dir.glob("*.json"):
-            try:
-                with open(session_file, "r") as f:
-                    data = json.load(f)
-                    session = Session.from_dict(data)
-                    self.sessions[session.id] = session
-            except Exception as e:
-                logger.error(f"Erro ao carregar sessão {session_file}: {e}")
+        with os.scandir(self.sessions_dir) as entries:
+            files = [
+                entry.path for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
+        
+        # Leitura e parsing em paralelo; o GIL é liberado durante a E/S
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            loaded = [session for session in executor.map(self._load_one, files) if session]
+        
+        wal_files = self._wal_files()
+        if wal_files:
+            loaded = self._replay_wal(loaded, wal_files)
+        
+        # Só as max_sessions mais recentes cabem na memória; as demais ficam
+        # no disco, representadas no índice pelo resumo. Inseridas da mais
+        # antiga à mais recente, para que as mais recentes sejam as últimas
+        # a sair do cache.
+        recent = heapq.nlargest(self.max_sessions, loaded, key=lambda s: s.updated_at)
+        in_memory = {session.id for session in recent}
+        for session in loaded:
+            if session.id not in in_memory:
+                self._register(SessionSummary.of(session), session)
+        for session in reversed(recent):
+            self._add_session(session)
+        self._evict_overflow()
+    
+    def _replay_wal(self, loaded: List[Session], wal_files: List[Path]) -> List[Session]:
+        """Aplica os logs sobre os snapshots e compacta o resultado.
+        
+        Os logs de todos os workers são reaplicados; os de processos que não
+        estão mais em execução são removidos depois que seus registros viram
+        snapshots. Os de workers ativos continuam com eles.
+        """
+        sessions = {session.id: session for session in loaded}
+        # IDs de mensagens e passos já aplicados, por sessão
+        seen: Dict[str, set] = {}
+        touched: Dict[str, Session] = {}
+        deleted = set()
+        
+        for wal_file in wal_files:
+            with open(wal_file, "rb") as wal:
+                for line in wal:
+                    try:
+                        record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # Última linha incompleta após uma queda
+                        logger.error(f"Registro inválido ignorado em {wal_file.name}")
+                        continue
+                    
+                    session_id = record["sid"]
+                    if record["op"] == "delete":
+                        sessions.pop(session_id, None)
+                        touched.pop(session_id, None)
+                        seen.pop(session_id, None)
+                        deleted.add(session_id)
+                        continue
+                    
+                    session = sessions.get(session_id)
+                    if record["op"] == "put":
+                        # Criação: nunca substitui um estado já conhecido
+                        if session is not None:
+                            continue
+                        session = Session.from_dict(record["data"])
+                    else:
+                        if session is None:
+                            # Sessão criada em um trecho do log já compactado
+                            session = Session(session_id=session_id)
+                            session.created_at = session.updated_at = record["ts"]
+                        ids = seen.get(session_id)
+                        if ids is None:
+                            ids = seen[session_id] = {m.id for m in session.messages}
+                            ids.update(t["id"] for t in session.thinking_steps)
+                        if not session.apply_op(record, ids):
+                            continue
+                    sessions[session_id] = session
+                    touched[session_id] = session
+                    deleted.discard(session_id)
+        
+        self._compact_sync(
+            [(sid, self._encode_session(s)) for sid, s in touched.items()],
+            deleted
+        )
+        if self._failed_snapshots or self._failed_deletes:
+            # Os logs continuam sendo a única cópia do que não foi gravado
+            return list(sessions.values())
+        for wal_file in wal_files:
+            if wal_file != self.wal_path and not self._worker_alive(wal_file):
+                wal_file.unlink(missing_ok=True)
+                wal_file.with_suffix(".lock").unlink(missing_ok=True)
+        return list(sessions.values())
+    
+    def _encode_session(self, session: Session) -> bytes:
+        """Serializa uma sessão para gravação, em JSON compacto."""
+        return orjson.dumps(
+            {**session.to_dict(), "seq": session.seq}, option=orjson.OPT_NON_STR_KEYS
+        )
+    
+    def _write_session_file(self, session_id: str, data: bytes) -> bool:
+        """Grava uma sessão já serializada no disco.
+        
+        A escrita vai para um arquivo temporário que substitui o snapshot
+        com ``os.replace``; uma queda no meio da gravação mantém o anterior.
+        """
+        session_file = self.sessions_dir / f"{session_id}.json"
+        tmp_file = session_file.with_name(f"{session_file.name}.{os.getpid()}.tmp")
+        try:
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, session_file)
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao salvar sessão {session_id}: {e}")
+            tmp_file.unlink(missing_ok=True)
+            return False
     
     def _save_session(self, session: Session):
-        """Salva uma sessão no disco."""
+        """Registra as alterações pendentes da sessão no log.
+        
+        Cada mutação vira um registro ``{sid, op, ...}`` anexado ao log do
+        worker (``wal-<pid>.log``), em vez de regravar a sessão inteira. Com o flusher em
+        execução os registros são agrupados e gravados a cada
+        ``flush_interval``; sem ele (por exemplo, fora de um loop asyncio)
+        a gravação é imediata. A cada ``compact_every`` registros os
+        snapshots são regravados e o log é truncado. Com o backplane, os
+        outros workers leem os snapshots das sessões deste, então toda
+        gravação também compacta.
+        """
         if not self.persist:
+            session._ops.clear()
+            return
+        
+        if not session._ops:
             return
         
+        for op in session._ops:
+            self._wal_buffer.append(
+                orjson.dumps({"sid": session.id, **op}, option=orjson.OPT_APPEND_NEWLINE)
+            )
+        session._ops.clear()
+        self._dirty[session.id] = session
+        
+        if self._flusher is None:
+            self._flush_sync()
+        else:
+            self._flush_event.set()
+    
+    def _log_delete(self, session_id: str):
+        """Registra a remoção de uma sessão no log."""
+        self._wal_buffer.append(orjson.dumps(
+            {"sid": session_id, "op": "delete"}, option=orjson.OPT_APPEND_NEWLINE
+        ))
+        self._dirty.pop(session_id, None)
+        self._deleted.add(session_id)
+        
+        if self._flusher is None:
+            self._flush_sync()
+        else:
+            self._flush_event.set()
+    
+    def _take_pending(self, compact: bool):
+        """Retira do buffer os registros e, se for compactar, os snapshots."""
+        records, self._wal_buffer = b"".join(self._wal_buffer), []
+        self._wal_records += records.count(b"\n")
+        
+        snapshots, deleted = None, None
+        if compact or self.backplane is not None or self._wal_records >= self.compact_every:
+            # Serializa no loop para não concorrer com alterações das sessões
+            snapshots = []
+            for session_id, session in self._dirty.items():
+                try:
+                    snapshots.append((session_id, self._encode_session(session)))
+                except Exception as e:
+                    logger.error(f"Erro ao salvar sessão {session_id}: {e}")
+            deleted, self._deleted = self._deleted, set()
+            self._dirty = {}
+            self._wal_records = 0
+        return records, snapshots, deleted
+    
+    def _write_pending(self, records: bytes, snapshots, deleted):
+        """Anexa registros ao log e, se houver snapshots, compacta."""
         try:
-            session_file = self.sessions_dir / f"{session.id}.json"
-            with open(session_file, "w") as f:
-                json.dump(session.to_dict(), f, indent=2)
+            if records:
+                self._wal.write(records)
         except Exception as e:
-            logger.error(f"Erro ao salvar sessão {session.id}: {e}")
+            logger.error(f"Erro ao gravar log de sessões: {e}")
+            return
+        if snapshots is not None:
+            self._compact_sync(snapshots, deleted)
+    
+    def _compact_sync(self, snapshots, deleted):
+        """Regrava os snapshots informados e trunca o log deste worker.
+        
+        Se algum snapshot falhar ao ser gravado ou apagado, o log é mantido
+        e a operação é tentada de novo na compactação seguinte.
+        """
+        pending, self._failed_snapshots = self._failed_snapshots, {}
+        pending.update(snapshots)
+        removed, self._failed_deletes = self._failed_deletes | set(deleted), set()
+        for session_id in removed:
+            pending.pop(session_id, None)
+            try:
+                (self.sessions_dir / f"{session_id}.json").unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"Erro ao remover sessão {session_id}: {e}")
+                self._failed_deletes.add(session_id)
+        for session_id, data in pending.items():
+            if not self._write_session_file(session_id, data):
+                self._failed_snapshots[session_id] = data
+        if self._failed_snapshots or self._failed_deletes:
+            return
+        try:
+            if self._wal is not None:
+                self._wal.truncate(0)
+            else:
+                self.wal_path.write_bytes(b"")
+        except Exception as e:
+            logger.error(f"Erro ao compactar log de sessões: {e}")
+    
+    def _flush_sync(self, compact: bool = False):
+        """Grava os registros pendentes de forma síncrona."""
+        self._write_pending(*self._take_pending(compact))
+    
+    async def flush(self, compact: bool = False):
+        """Grava no disco os registros pendentes, compactando se necessário."""
+        if not self.persist:
+            return
+        async with self._flush_lock:
+            await asyncio.to_thread(self._write_pending, *self._take_pending(compact))
+    
+    async def _flush_loop(self):
+        """Grava periodicamente os registros pendentes."""
+        while True:
+            await self._flush_event.wait()
+            self._flush_event.clear()
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                # Um erro de E/S não pode encerrar o flusher
+                logger.error(f"Erro ao gravar sessões: {e}")
+    
+    def _register(self, entry: "Session | SessionSummary", session: Session):
+        """Inclui uma sessão no índice de sessões conhecidas e nas estatísticas."""
+        self._summaries[entry.id] = entry
+        self._by_updated.add((-entry.updated_at, entry.id))
+        self._status_counts[entry.status] += 1
+        self._total_messages += entry.message_count
+        self._index_session(session)
+    
+    def _unregister(self, session_id: str) -> Optional["Session | SessionSummary"]:
+        """Retira uma sessão do índice de sessões conhecidas e das estatísticas.
+        
+        Os tokens continuam no índice de busca; quem chama decide se os remove.
+        """
+        entry = self._summaries.pop(session_id, None)
+        if entry is not None:
+            self._by_updated.discard((-entry.updated_at, session_id))
+            self._count_status(entry.status, -1)
+            self._total_messages -= entry.message_count
+        return entry
+    
+    def _add_session(self, session: Session):
+        """Coloca uma sessão em memória, substituindo a entrada anterior no índice."""
+        previous = self._unregister(session.id)
+        if isinstance(previous, Session) and previous is not session:
+            self.sessions.pop(session.id)
+            self._unindex_session(previous)
+            previous._manager = None
+        self.sessions[session.id] = session
+        self._register(session, session)
+        session._manager = self
+    
+    def _evict_session(self, session_id: str) -> Optional[Session]:
+        """Retira uma sessão da memória, mantendo seu resumo no índice.
+        
+        Sem persistência a sessão não pode ser recarregada e sai também dos
+        índices.
+        """
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            if self.persist:
+                self._summaries[session_id] = SessionSummary.of(session)
+            else:
+                self._unregister(session_id)
+                self._unindex_session(session)
+            session._manager = None
+        return session
+    
+    def _forget_session(self, session_id: str) -> bool:
+        """Remove uma sessão da memória e de todos os índices."""
+        if self._unregister(session_id) is None:
+            return False
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session._manager = None
+            self._schedule_release(session)
+        else:
+            # Fora da memória: os tokens indexados vêm do disco
+            session = self._dirty.get(session_id) or self.load_snapshot(session_id)
+        if session is not None:
+            self._unindex_session(session)
+        self._unindexed.discard(session_id)
+        return True
+    
+    def _count_status(self, status: str, delta: int):
+        """Ajusta a contagem de um status, descartando contagens zeradas."""
+        self._status_counts[status] += delta
+        if not self._status_counts[status]:
+            del self._status_counts[status]
+    
+    def _index_message(self, session_id: str, message: Message):
+        """Adiciona os tokens de uma mensagem ao índice de busca."""
+        for token in _tokens(message.content):
+            postings = self._tokens[token]
+            if not postings:
+                self._vocab.add(token)
+                self._vocab_reversed.add(token[::-1])
+            postings.add(session_id)
+        if len(message.content) > SEARCH_INDEX_CHARS:
+            self._unindexed.add(session_id)
+    
+    def _index_session(self, session: Session):
+        """Adiciona as mensagens da sessão ao índice de busca."""
+        for message in session.messages:
+            self._index_message(session.id, message)
+    
+    def _unindex_session(self, session: Session):
+        """Remove a sessão do índice de busca."""
+        tokens = set()
+        for message in session.messages:
+            tokens |= _tokens(message.content)
+        for token in tokens:
+            postings = self._tokens.get(token)
+            if postings is not None:
+                postings.discard(session.id)
+                if not postings:
+                    del self._tokens[token]
+                    self._vocab.remove(token)
+                    self._vocab_reversed.remove(token[::-1])
+        self._unindexed.discard(session.id)
+    
+    def _search_candidates(self, query_lower: str) -> Optional[set]:
+        """IDs das sessões que podem conter a consulta, segundo o índice.
+        
+        Tokens nas pontas da consulta podem ser pedaços de palavras maiores
+        e são comparados como prefixo ou sufixo dos tokens indexados, em
+        O(log V) sobre o vocabulário ordenado. Só uma consulta de um único
+        token, que pode estar no meio de uma palavra, percorre o vocabulário
+        inteiro. Os tokens completos são resolvidos primeiro. Retorna
+        ``None`` se a consulta não tiver tokens.
+        """
+        matches = sorted(
+            _TOKEN_RE.finditer(query_lower),
+            key=lambda m: (m.start() == 0) + (m.end() == len(query_lower))
+        )
+        if not matches:
+            return None
+        
+        matched = None
+        for match in matches:
+            token = match.group()
+            left_open = match.start() == 0
+            right_open = match.end() == len(query_lower)
+            if left_open and right_open:
+                keys = [t for t in self._vocab if token in t]
+            elif left_open:
+                keys = [
+                    t[::-1] for t in
+                    self._vocab_reversed.irange(token[::-1], token[::-1] + "\U0010ffff")
+                ]
+            elif right_open:
+                keys = list(self._vocab.irange(token, token + "\U0010ffff"))
+            else:
+                keys = [token] if token in self._tokens else []
+            ids = set().union(*(self._tokens[t] for t in keys))
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                break
+        return matched | self._unindexed
+    
+    def _on_message(self, session: Session, message: Message):
+        """Indexa e contabiliza uma nova mensagem."""
+        self._index_message(session.id, message)
+        self._total_messages += 1
+    
+    def _on_status(self, session: Session, previous: str):
+        """Move a sessão entre as contagens de status."""
+        self._count_status(previous, -1)
+        self._status_counts[session.status] += 1
+    
+    def _on_updated(self, session: Session, previous: float):
+        """Reposiciona a sessão no índice após uma alteração."""
+        self._by_updated.discard((-previous, session.id))
+        self._by_updated.add((-session.updated_at, session.id))
+    
+    @staticmethod
+    def _in_use(session: Session) -> bool:
+        """Indica se a sessão tem WebSocket conectado ou agente em execução."""
+        return bool(session.websockets) or session.task is not None
+    
+    def _evict_overflow(self):
+        """Remove da memória as sessões menos usadas acima do limite.
+        
+        Sessões em uso não são removidas, como no sweeper; o cache pode
+        passar do limite enquanto todas estiverem em uso.
+        """
+        while (session_id := self.sessions.overflow(self._in_use)) is not None:
+            self._schedule_release(self._evict_session(session_id))
     
     def create_session(self, metadata: Optional[Dict] = None) -> Session:
         """Cria uma nova sessão."""
         session = Session()
         if metadata:
             session.metadata = metadata
-        self.sessions[session.id] = session
+        self._add_session(session)
+        self._evict_overflow()
+        session._ops.append({"op": "put", "seq": session.seq, "data": session.to_dict()})
         self._save_session(session)
+        if self.backplane is not None:
+            # O snapshot é gravado já na criação, para leituras em outros workers
+            if self._flusher is not None:
+                self._spawn(self.flush())
+            self._spawn(self.backplane.register_session(session.id))
         return session
     
     def get_session(self, session_id: str) -> Optional[Session]:
-        """Obtém uma sessão pelo ID."""
-        return self.sessions.get(session_id)
+        """Obtém uma sessão pelo ID, recarregando do disco se necessário."""
+        session = self.sessions.get(session_id)
+        
+        if session is None:
+            # Sessão removida da memória com snapshot ainda desatualizado
+            session = self._dirty.get(session_id)
+            if session is not None:
+                self._add_session(session)
+                self._evict_overflow()
+        
+        if session is None and self.persist and Path(session_id).name == session_id:
+            session_file = self.sessions_dir / f"{session_id}.json"
+            if session_file.exists():
+                session = self._load_one(session_file)
+                if session:
+                    self._add_session(session)
+                    self._evict_overflow()
+        
+        if session is not None:
+            self.touch(session)
+        return session
+    
+    def attach_remote_session(self, session_id: str) -> Session:
+        """Cria um stub para receber os broadcasts de uma sessão de outro worker.
+        
+        O stub só guarda os WebSockets conectados a este worker: não entra em
+        ``self.sessions`` e nunca é persistido. O histórico pertence ao dono.
+        """
+        session = self._remote.get(session_id)
+        if session is None:
+            session = self._remote[session_id] = Session(session_id=session_id)
+        return session
+    
+    def detach_remote_session(self, session: Session):
+        """Descarta o stub quando não restam WebSockets conectados."""
+        if not session.websockets and self._remote.get(session.id) is session:
+            del self._remote[session.id]
+    
+    def is_remote(self, session: Session) -> bool:
+        """Indica se a sessão é um stub de uma sessão de outro worker."""
+        return self._remote.get(session.id) is session
+    
+    async def remote_owner(self, session_id: str) -> Optional[str]:
+        """Worker ativo que é dono da sessão, se não for este."""
+        if self.backplane is None:
+            return None
+        return await self.backplane.remote_owner(session_id)
+    
+    def claim_session(self, session_id: str):
+        """Registra este worker como dono da sessão no backplane."""
+        if self.backplane is not None:
+            self._spawn(self.backplane.register_session(session_id))
+    
+    def load_snapshot(self, session_id: str) -> Optional[Session]:
+        """Lê o snapshot de uma sessão sem mantê-la em memória."""
+        if not self.persist or Path(session_id).name != session_id:
+            return None
+        session_file = self.sessions_dir / f"{session_id}.json"
+        if not session_file.exists():
+            return None
+        return self._load_one(session_file)
+    
+    def touch(self, session: Session):
+        """Registra um acesso à sessão, promovendo-a no cache 2Q."""
+        session.last_touch = _monotonic()
+        self.sessions.hit(session.id)
     
     def update_session(self, session: Session):
         """Atualiza uma sessão."""
-        self.sessions[session.id] = session
+        if self.is_remote(session):
+            logger.error(f"Sessão {session.id} pertence a outro worker e não será gravada")
+            session._ops.clear()
+            return
+        if self.sessions.get(session.id) is not session:
+            self._add_session(session)
+        # Gravações não contam como acesso para a política de substituição
+        session.last_touch = _monotonic()
+        self._evict_overflow()
         self._save_session(session)
     
     def delete_session(self, session_id: str) -> bool:
-        """Remove uma sessão."""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        """Remove uma sessão, esteja ela em memória ou apenas no disco."""
+        found = self._forget_session(session_id)
+        
+        if self.persist and Path(session_id).name == session_id:
+            session_file = self.sessions_dir / f"{session_id}.json"
+            if found or session_file.exists():
+                found = True
+                self._log_delete(session_id)
+                try:
+                    session_file.unlink(missing_ok=True)
+                except OSError as e:
+                    # A compactação tenta apagar de novo
+                    logger.error(f"Erro ao remover sessão {session_id}: {e}")
+        
+        if found and self.backplane is not None:
+            self._spawn(self.backplane.unregister_session(session_id))
+        
+        return found
+    
+    async def broadcast(self, session_id: str, message: dict):
+        """Enfileira uma mensagem para os WebSockets conectados à sessão.
+        
+        Mensagens enfileiradas dentro de ``coalesce_window`` segundos são
+        enviadas juntas em um único frame contendo uma lista.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            if self.backplane is not None:
+                self.backplane.publish(session_id, orjson.dumps(message).decode())
+            return
+        
+        if not session.websockets and self.backplane is None:
+            self.touch(session)
+            return
+        
+        if session.writer is None:
+            session.out_queue = asyncio.Queue()
+            session.writer = asyncio.create_task(self._writer(session))
+        session.out_queue.put_nowait(message)
+    
+    async def _writer(self, session: Session):
+        """Agrupa as mensagens enfileiradas da sessão e as envia."""
+        queue = session.out_queue
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.coalesce_window
+            while (timeout := deadline - loop.time()) > 0:
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             
-            if self.persist:
-                session_file = self.sessions_dir / f"{session_id}.json"
-                if session_file.exists():
-                    session_file.unlink()
+            # Serializa uma única vez para os sockets locais e o backplane
+            message = batch[0] if len(batch) == 1 else batch
+            try:
+                payload = orjson.dumps(message).decode()
+            except TypeError as e:
+                logger.error(f"Erro ao serializar mensagem da sessão {session.id}: {e}")
+                continue
             
-            return True
-        return False
+            # A publicação é enfileirada; a entrega local não espera o Redis
+            if self.backplane is not None:
+                self.backplane.publish(session.id, payload)
+            await self._deliver(session.id, payload, message)
+    
+    async def _deliver(self, session_id: str, payload: str, message: Any = None):
+        """Entrega uma mensagem serializada aos WebSockets deste worker."""
+        session = self.sessions.get(session_id) or self._remote.get(session_id)
+        if session is None:
+            return
+        self.touch(session)
+        sockets = session.websockets
+        if not sockets:
+            return
+        
+        # Envia para todos em paralelo, codificando msgpack uma única vez
+        targets = list(sockets)
+        packed = None
+        sends = []
+        for ws in targets:
+            if wants_msgpack(ws):
+                if packed is None:
+                    packed = ormsgpack.packb(message if message is not None else orjson.loads(payload))
+                sends.append(ws.send_bytes(packed))
+            else:
+                sends.append(ws.send_text(payload))
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        
+        # Remove sockets mortos somente após o envio
+        for ws, result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error(f"Erro ao enviar mensagem WebSocket: {result}")
+                if ws in sockets:
+                    sockets.remove(ws)
+    
+    def start_task(self, session: Session, coro) -> asyncio.Task:
+        """Executa a corrotina do agente como a tarefa da sessão."""
+        task = asyncio.create_task(coro)
+        session.task = task
+        
+        def _clear(done: asyncio.Task):
+            if session.task is done:
+                session.task = None
+        
+        task.add_done_callback(_clear)
+        return task
+    
+    async def cancel_task(self, session: Session):
+        """Cancela a tarefa da sessão e aguarda sua finalização."""
+        task, session.task = session.task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    async def release(self, session: Session):
+        """Libera tarefa, agente e WebSockets de uma sessão."""
+        await self.cancel_task(session)
+        
+        if session.writer is not None:
+            session.writer.cancel()
+            session.writer = None
+            session.out_queue = None
+        
+        if session.agent is not None:
+            try:
+                await session.agent.cleanup()
+            except Exception as e:
+                logger.error(f"Erro ao liberar agente da sessão {session.id}: {e}")
+            session.agent = None
+        
+        sockets, session.websockets = session.websockets, []
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+    
+    def _schedule_release(self, session: Session):
+        """Agenda a liberação de uma sessão removida fora de um contexto async."""
+        if (
+            not session.websockets
+            and session.agent is None
+            and session.task is None
+            and session.writer is None
+        ):
+            return
+        self._spawn(self.release(session))
+    
+    def _spawn(self, coro):
+        """Executa uma corrotina em segundo plano, se houver loop em execução."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            coro.close()
+            return
+        task = loop.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    async def _sweep(self):
+        """Remove periodicamente sessões ociosas da memória."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            cutoff = _monotonic() - self.idle_ttl
+            
+            # Sessões com WebSocket conectado ou agente em execução seguem ativas
+            expired = [
+                session for session in self.sessions.values()
+                if session.last_touch < cutoff and not self._in_use(session)
+            ]
+            for session in expired:
+                self._evict_session(session.id)
+            
+            if expired:
+                await asyncio.gather(*(self.release(s) for s in expired))
+                logger.info(f"{len(expired)} sessões ociosas removidas da memória")
+    
+    def start(self):
+        """Inicia a limpeza periódica, a gravação adiada e o backplane."""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep())
+        if self.persist and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if self.backplane is not None:
+            self.backplane.start()
+    
+    async def stop(self):
+        """Encerra as tarefas de fundo e libera todas as sessões."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._flusher is not None:
+            # Aguarda uma gravação em andamento antes de cancelar o flusher
+            async with self._flush_lock:
+                self._flusher.cancel()
+                self._flusher = None
+        await self.flush(compact=True)
+        
+        sessions = [*self.sessions.values(), *self._remote.values()]
+        self._remote.clear()
+        await asyncio.gather(*(self.release(s) for s in sessions))
+        
+        if self.backplane is not None:
+            await self.backplane.stop()
+        
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        if self._wal_lock is not None:
+            # Os outros workers passam a ver este log como de um worker encerrado
+            self._wal_lock.close()
+            self._wal_lock = None
     
     def list_sessions(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Lista sessões ordenadas por data de atualização."""
-        sessions = sorted(
-            self.sessions.values(),
-            key=lambda s: s.updated_at,
-            reverse=True
-        )
+        sessions = [
+            self._summaries[session_id]
+            for _, session_id in self._by_updated.islice(offset, offset + limit)
+        ]
         
         return [
             {
                 "id": s.id,
-                "created_at": s.created_at.isoformat(),
-                "updated_at": s.updated_at.isoformat(),
+                "created_at": s.created_iso,
+                "updated_at": s.updated_iso,
                 "status": s.status,
-                "message_count": len(s.messages),
-                "preview": s.messages[0]["content"][:100] if s.messages else ""
+                "message_count": s.message_count,
+                "preview": s.preview
             }
-            for s in sessions[offset:offset + limit]
+            for s in sessions
         ]
     
     def search_sessions(self, query: str) -> List[Dict[str, Any]]:
-        """Busca sessões por conteúdo."""
+        """Busca sessões por conteúdo.
+        
+        O índice de tokens seleciona as candidatas, confirmadas depois por
+        busca de substring. Consultas sem tokens percorrem todas as sessões.
+        Candidatas fora da memória são lidas do disco sem voltar ao cache.
+        """
         results = []
         query_lower = query.lower()
+        matched = self._search_candidates(query_lower)
+        
+        if matched is None:
+            candidate_ids = [session_id for _, session_id in self._by_updated]
+        else:
+            candidate_ids = sorted(
+                (session_id for session_id in matched if session_id in self._summaries),
+                key=lambda session_id: self._summaries[session_id].updated_at,
+                reverse=True
+            )
         
-        for session in self.sessions.values():
+        for session_id in candidate_ids:
+            session = (
+                self.sessions.get(session_id)
+                or self._dirty.get(session_id)
+                or self.load_snapshot(session_id)
+            )
+            if session is None:
+                continue
             for message in session.messages:
-                if query_lower in message["content"].lower():
+                if query_lower in message.content.lower():
                     results.append({
                         "id": session.id,
-                        "created_at": session.created_at.isoformat(),
-                        "updated_at": session.updated_at.isoformat(),
+                        "created_at": session.created_iso,
+                        "updated_at": session.updated_iso,
                         "status": session.status,
-                        "match": message["content"][:200]
+                        "match": message.content[:200]
                     })
                     break
         
@@ -214,11 +1304,11 @@ class SessionManager:
     
     def cleanup_old_sessions(self, days: int = 30):
         """Remove sessões antigas."""
-        cutoff = datetime.now().timestamp() - (days * 24 * 60 * 60)
+        cutoff = _now() - (days * 24 * 60 * 60)
         
         to_delete = []
-        for session_id, session in self.sessions.items():
-            if session.updated_at.timestamp() < cutoff:
+        for session_id, entry in self._summaries.items():
+            if entry.updated_at < cutoff:
                 to_delete.append(session_id)
         
         for session_id in to_delete:
@@ -227,21 +1317,21 @@ class SessionManager:
         return len(to_delete)
     
     def get_session_stats(self) -> Dict[str, Any]:
-        """Obtém estatísticas das sessões."""
-        total = len(self.sessions)
-        by_status = {}
-        total_messages = 0
-        
-        for session in self.sessions.values():
-            by_status[session.status] = by_status.get(session.status, 0) + 1
-            total_messages += len(session.messages)
-        
+        """Obtém estatísticas das sessões, mantidas incrementalmente."""
         return {
-            "total_sessions": total,
-            "by_status": by_status,
-            "total_messages": total_messages
+            "total_sessions": len(self._summaries),
+            "by_status": dict(self._status_counts),
+            "total_messages": self._total_messages
         }
 
 
-# Singleton instance
-session_manager = SessionManager()
+# Instância única, criada no primeiro uso para não carregar as sessões na importação
+_session_manager: Optional[SessionManager] = None
+
+
+def get_session_manager() -> SessionManager:
+    """Retorna o gerenciador de sessões, criando-o se necessário."""
+    global _session_manager
+    if _session_manager is None:
+        _session_manager = SessionManager()
+    return _session_manager
@@ -101,8 +101,10 @@ class OtomanusApp {
         };
         
         this.websocket.onmessage = (event) => {
+            // O servidor agrupa rajadas de mensagens em uma lista
             const data = JSON.parse(event.data);
-            this.handleWebSocketMessage(data);
+            const messages = Array.isArray(data) ? data : [data];
+            messages.forEach(message => this.handleWebSocketMessage(message));
         };
         
         this.websocket.onerror = (error) => {
@@ -374,14 +376,15 @@ class OtomanusApp {
         
         try {
             const response = await fetch('/api/files');
-            const data = await response.json();
+            const text = await response.text();
+            const files = text.split('\n').filter(line => line).map(line => JSON.parse(line));
             
-            if (data.files.length === 0) {
+            if (files.length === 0) {
                 filesList.innerHTML = '<div class="mcp-empty">Nenhum arquivo no workspace</div>';
                 return;
             }
             
-            filesList.innerHTML = data.files.map(file => `
+            filesList.innerHTML = files.map(file => `
                 <div class="file-item" data-path="${file.path}">
                     <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
                         <path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"/>
@@ -0,0 +1,67 @@
+import importlib
+import os
+
+import pytest
+
+from app.web import session_manager
+from app.web.session_manager import SessionManager
+
+
+@pytest.fixture
+def make_manager(tmp_path, monkeypatch):
+    """Creates session managers persisting to a temporary directory.
+
+    ``pid`` sets the worker process id used to name the write-ahead log, so
+    several managers in one test behave like separate workers.
+    """
+    monkeypatch.setattr(session_manager, "PROJECT_ROOT", tmp_path)
+    managers = []
+
+    def factory(pid: int = 1000, **kwargs) -> SessionManager:
+        monkeypatch.setattr(os, "getpid", lambda: pid)
+        manager = SessionManager(**kwargs)
+        managers.append(manager)
+        return manager
+
+    yield factory
+
+    for manager in managers:
+        crash(manager)
+
+
+def crash(manager: SessionManager):
+    """Drops a manager's log and lock handles without flushing, like a killed worker."""
+    for handle in (manager._wal, manager._wal_lock):
+        if handle is not None and not handle.closed:
+            handle.close()
+
+
+@pytest.fixture
+def redis_url(monkeypatch):
+    """Points every backplane at one in-process fakeredis server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.web import backplane
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        backplane.aioredis, "from_url",
+        lambda url: fakeredis.aioredis.FakeRedis(server=server)
+    )
+    return "redis://fake"
+
+
+@pytest.fixture
+def web_app():
+    """The ``app.web.app`` module; the package re-exports the FastAPI object under the same name."""
+    return importlib.import_module("app.web.app")
+
+
+@pytest.fixture
+def client(web_app, make_manager, monkeypatch):
+    """A test client whose application uses a temporary session manager."""
+    from fastapi.testclient import TestClient
+
+    manager = make_manager()
+    monkeypatch.setattr(session_manager, "_session_manager", manager)
+    with TestClient(web_app.app) as test_client:
+        yield test_client
@@ -0,0 +1,80 @@
+import asyncio
+
+import orjson
+import pytest
+
+from app.web.session_manager import get_session_manager
+
+
+class QueuedWebSocket:
+    """Feeds ``receive`` from a queue, so tests control when frames arrive."""
+
+    def __init__(self):
+        self.frames = asyncio.Queue()
+
+    def push(self, message=None, disconnect=False):
+        if disconnect:
+            self.frames.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        else:
+            self.frames.put_nowait({"type": "websocket.receive", "text": orjson.dumps(message).decode()})
+
+    async def receive(self):
+        return await self.frames.get()
+
+
+@pytest.mark.asyncio
+async def test_receive_batch_gathers_frames_already_waiting(web_app):
+    """Tests that a burst is returned together and later frames start a new batch."""
+    ws = QueuedWebSocket()
+    for i in range(3):
+        ws.push({"type": "chat", "content": str(i)})
+
+    messages, closed = await web_app._receive_batch(ws)
+    assert [m["content"] for m in messages] == ["0", "1", "2"]
+    assert not closed
+
+    ws.push({"type": "ping"})
+    assert await web_app._receive_batch(ws) == ([{"type": "ping"}], False)
+
+
+@pytest.mark.asyncio
+async def test_receive_batch_is_capped(web_app):
+    """Tests that a batch never holds more than WS_BATCH_MAX_FRAMES frames."""
+    ws = QueuedWebSocket()
+    for i in range(web_app.WS_BATCH_MAX_FRAMES + 5):
+        ws.push({"type": "ping", "n": i})
+
+    first, _ = await web_app._receive_batch(ws)
+    second, _ = await web_app._receive_batch(ws)
+    assert len(first) == web_app.WS_BATCH_MAX_FRAMES
+    assert [m["n"] for m in second] == list(range(web_app.WS_BATCH_MAX_FRAMES, web_app.WS_BATCH_MAX_FRAMES + 5))
+
+
+@pytest.mark.asyncio
+async def test_receive_batch_keeps_frames_before_disconnect(web_app):
+    """Tests that frames collected before a disconnect are still returned."""
+    ws = QueuedWebSocket()
+    ws.push({"type": "chat", "content": "último"})
+    ws.push(disconnect=True)
+
+    messages, closed = await web_app._receive_batch(ws)
+    assert messages == [{"type": "chat", "content": "último"}]
+    assert closed
+
+
+def test_chats_in_a_burst_are_all_handled(web_app, client, monkeypatch):
+    """Tests that every chat of a burst is dispatched and pings get a pong."""
+    handled = []
+
+    async def handle_chat(prompt, session_id=None):
+        handled.append((prompt, session_id))
+
+    monkeypatch.setattr(web_app, "_handle_chat", handle_chat)
+    session = get_session_manager().create_session()
+    with client.websocket_connect(f"/ws/{session.id}") as ws:
+        for prompt in ("um", "dois", "três"):
+            ws.send_text(orjson.dumps({"type": "chat", "content": prompt}).decode())
+        ws.send_text(orjson.dumps({"type": "ping"}).decode())
+        assert orjson.loads(ws.receive_text()) == {"type": "pong"}
+
+    assert handled == [(prompt, session.id) for prompt in ("um", "dois", "três")]
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def workspace(web_app, tmp_path, monkeypatch):
+    """A temporary workspace with a secret file next to it."""
+    root = tmp_path / "workspace"
+    (root / "docs").mkdir(parents=True)
+    (root / "docs" / "notes.txt").write_text("dentro", encoding="utf-8")
+    (root / "image.bin").write_bytes(b"\x89PNG\x00\x01")
+    (tmp_path / "secret.txt").write_text("fora", encoding="utf-8")
+    monkeypatch.setattr(web_app, "WORKSPACE_ROOT", root)
+    return root
+
+
+@pytest.mark.parametrize("path", [
+    "..%2Fsecret.txt",
+    "docs%2F..%2F..%2Fsecret.txt",
+])
+def test_relative_traversal_is_forbidden(client, workspace, path):
+    """Tests that ../ segments cannot leave the workspace."""
+    response = client.get(f"/api/files/{path}")
+    assert response.status_code == 403
+
+
+def test_absolute_path_is_forbidden(client, workspace):
+    """Tests that an absolute path outside the workspace is rejected."""
+    secret = workspace.parent / "secret.txt"
+    response = client.get(f"/api/files/{str(secret).replace('/', '%2F')}")
+    assert response.status_code == 403
+
+
+def test_symlink_out_of_workspace_is_forbidden(client, workspace):
+    """Tests that a link inside the workspace cannot point outside it."""
+    link = workspace / "link.txt"
+    try:
+        link.symlink_to(workspace.parent / "secret.txt")
+    except OSError:
+        pytest.skip("symlinks not supported")
+    assert client.get("/api/files/link.txt").status_code == 403
+
+
+def test_files_inside_workspace_are_served(client, workspace):
+    """Tests that text files return their content and binaries are sent as files."""
+    response = client.get("/api/files/docs/notes.txt")
+    assert response.status_code == 200
+    assert response.json() == {"content": "dentro", "type": "text"}
+
+    response = client.get("/api/files/image.bin")
+    assert response.status_code == 200
+    assert response.content == b"\x89PNG\x00\x01"
+
+    assert client.get("/api/files/missing.txt").status_code == 404
+    assert client.get("/api/files/docs").status_code == 400
@@ -0,0 +1,41 @@
+import pytest
+
+
+def _write_log(path, count, trailing_newline=True):
+    text = "\n".join(f"linha {i}" for i in range(count))
+    path.write_text(text + ("\n" if trailing_newline else ""), encoding="utf-8")
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64 * 1024])
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_read_tail_matches_splitlines(web_app, tmp_path, block_size, trailing_newline):
+    """Tests that reading blocks backwards gives the same tail as reading the whole file."""
+    log = tmp_path / "app.log"
+    _write_log(log, 50, trailing_newline)
+    whole = log.read_text(encoding="utf-8").split("\n")
+
+    for lines in (1, 3, 50, 200):
+        expected = "\n".join(whole[-lines:])
+        assert web_app._read_tail(log, lines, block_size) == expected
+
+
+def test_read_tail_edge_cases(web_app, tmp_path):
+    """Tests empty files, non-positive counts and undecodable bytes."""
+    log = tmp_path / "app.log"
+    log.write_bytes(b"")
+    assert web_app._read_tail(log, 10) == ""
+
+    log.write_bytes(b"ok\n\xff\xfe\n")
+    assert web_app._read_tail(log, 0) == ""
+    assert web_app._read_tail(log, 2) == "��\n"
+
+
+def test_get_log_endpoint(web_app, client, tmp_path, monkeypatch):
+    """Tests that the endpoint returns the last lines and 404 for unknown logs."""
+    monkeypatch.setattr(web_app, "PROJECT_ROOT", tmp_path)
+    (tmp_path / "logs").mkdir()
+    _write_log(tmp_path / "logs" / "app.log", 500)
+
+    response = client.get("/api/logs/app.log", params={"lines": 2})
+    assert response.json() == {"name": "app.log", "content": "linha 499\n"}
+    assert client.get("/api/logs/missing.log").status_code == 404
@@ -0,0 +1,39 @@
+import orjson
+import pytest
+
+from app.web.session_manager import get_session_manager
+
+ormsgpack = pytest.importorskip("ormsgpack")
+
+
+def test_text_frames_get_json_replies(client):
+    """Tests that clients sending text keep receiving JSON text frames."""
+    session = get_session_manager().create_session()
+    with client.websocket_connect(f"/ws/{session.id}") as ws:
+        ws.send_text(orjson.dumps({"type": "ping"}).decode())
+        assert orjson.loads(ws.receive_text()) == {"type": "pong"}
+
+
+def test_binary_frames_switch_replies_to_msgpack(client):
+    """Tests that a client sending msgpack receives msgpack frames back."""
+    session = get_session_manager().create_session()
+    with client.websocket_connect(f"/ws/{session.id}") as ws:
+        ws.send_bytes(ormsgpack.packb({"type": "ping"}))
+        assert ormsgpack.unpackb(ws.receive_bytes()) == {"type": "pong"}
+
+
+def test_broadcast_reaches_each_client_in_its_framing(client):
+    """Tests that one broadcast is sent as JSON and as msgpack to mixed clients."""
+    manager = get_session_manager()
+    session = manager.create_session()
+    with client.websocket_connect(f"/ws/{session.id}") as text_ws, \
+            client.websocket_connect(f"/ws/{session.id}") as binary_ws:
+        text_ws.send_text(orjson.dumps({"type": "ping"}).decode())
+        text_ws.receive_text()
+        binary_ws.send_bytes(ormsgpack.packb({"type": "ping"}))
+        binary_ws.receive_bytes()
+
+        client.portal.call(manager.broadcast, session.id, {"type": "status", "status": "idle"})
+        expected = {"type": "status", "status": "idle"}
+        assert orjson.loads(text_ws.receive_text()) == expected
+        assert ormsgpack.unpackb(binary_ws.receive_bytes()) == expected
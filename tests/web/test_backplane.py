@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.web.backplane import RedisBackplane
+
+
+class FakeWebSocket:
+    """Collects the text frames sent to it."""
+
+    def __init__(self):
+        self.state = type("State", (), {})()
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self):
+        pass
+
+
+async def _wait_for(condition, timeout=1.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition() and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_other_workers_in_order(redis_url):
+    """Tests that published messages reach other workers in order and never echo."""
+    received = {"w1": [], "w2": []}
+
+    async def deliver_w1(session_id, payload):
+        received["w1"].append((session_id, payload))
+
+    async def deliver_w2(session_id, payload):
+        received["w2"].append((session_id, payload))
+
+    w1 = RedisBackplane(redis_url, deliver_w1)
+    w2 = RedisBackplane(redis_url, deliver_w2)
+    w1.start()
+    w2.start()
+    await asyncio.sleep(0.05)
+
+    for i in range(5):
+        w1.publish("abc", f'{{"n":{i}}}')
+    await _wait_for(lambda: len(received["w2"]) == 5)
+
+    assert received["w2"] == [("abc", f'{{"n":{i}}}') for i in range(5)]
+    assert received["w1"] == []
+    await w1.stop()
+    await w2.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_owner_follows_heartbeat(redis_url):
+    """Tests that a session is remote only while its owner is alive."""
+    owner = RedisBackplane(redis_url, None)
+    other = RedisBackplane(redis_url, None)
+    owner.start()
+    await asyncio.sleep(0.05)
+
+    await owner.register_session("abc")
+    assert await other.remote_owner("abc") == owner.worker_id
+    assert await owner.remote_owner("abc") is None
+    assert await other.remote_owner("desconhecida") is None
+
+    await owner.stop()
+    assert await other.remote_owner("abc") is None
+    await other.stop()
+
+
+@pytest.mark.asyncio
+async def test_local_delivery_does_not_wait_for_redis(make_manager, redis_url):
+    """Tests that local sockets get a broadcast even while Redis is not draining."""
+    manager = make_manager(persist=False, coalesce_window=0)
+    # Backplane never started: nothing is sent to Redis
+    manager.backplane = RedisBackplane(redis_url, manager._deliver)
+    session = manager.create_session()
+    ws = FakeWebSocket()
+    session.websockets.append(ws)
+
+    await manager.broadcast(session.id, {"type": "status"})
+    await _wait_for(lambda: ws.sent)
+
+    assert ws.sent == ['{"type":"status"}']
+    assert manager.backplane._outbox.qsize() == 1
+    await manager.release(session)
+
+
+@pytest.mark.asyncio
+async def test_owner_snapshot_is_readable_by_other_worker(make_manager, redis_url):
+    """Tests that a session created after another worker started is readable there."""
+    reader = make_manager(pid=2000)
+    owner = make_manager(pid=1000, flush_interval=0)
+    owner.backplane = RedisBackplane(redis_url, owner._deliver)
+    owner.start()
+
+    session = owner.create_session()
+    await asyncio.sleep(0.05)
+    assert reader.load_snapshot(session.id) is not None
+
+    session.add_message("user", "visível em outro worker")
+    owner.update_session(session)
+    await asyncio.sleep(0.05)
+    snapshot = reader.load_snapshot(session.id)
+    assert [m.content for m in snapshot.messages] == ["visível em outro worker"]
+    await owner.stop()
+
+
+def test_remote_session_is_never_persisted(make_manager):
+    """Tests that a stub for another worker's session stays out of the cache and disk."""
+    manager = make_manager()
+    stub = manager.attach_remote_session("remota")
+    assert "remota" not in manager.sessions
+    assert manager.is_remote(stub)
+
+    stub.add_message("user", "não deve ser gravada")
+    manager.update_session(stub)
+    manager._flush_sync(compact=True)
+    assert not (manager.sessions_dir / "remota.json").exists()
+
+    manager.detach_remote_session(stub)
+    assert not manager.is_remote(stub)
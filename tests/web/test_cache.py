@@ -0,0 +1,87 @@
+from app.web.cache import ShardedCache, TwoQueueCache
+
+
+def test_new_entries_enter_a1_and_hit_promotes_to_am():
+    """Tests that entries start in A1 and move to Am on a second access."""
+    cache = TwoQueueCache(8)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert list(cache.a1) == ["a", "b"]
+    assert not cache.am
+
+    cache.hit("a")
+    assert list(cache.a1) == ["b"]
+    assert list(cache.am) == ["a"]
+    assert cache["a"] == 1
+
+
+def test_get_does_not_change_position():
+    """Tests that get reads a value without promoting the entry."""
+    cache = TwoQueueCache(8)
+    cache["a"] = 1
+    assert cache.get("a") == 1
+    assert cache.get("missing", "default") == "default"
+    assert "a" in cache.a1
+
+
+def test_victim_prefers_a1_fifo_when_a1_is_over_its_share():
+    """Tests that entries used only once leave before hot entries."""
+    cache = TwoQueueCache(4, a1_ratio=0.25)
+    cache["hot"] = 0
+    cache.hit("hot")
+    for key in ("x", "y", "z"):
+        cache[key] = 0
+
+    # A1 holds three entries, above its share of one: oldest A1 entry goes first
+    assert cache.victim() == "x"
+    cache.pop("x")
+    assert cache.victim() == "y"
+
+
+def test_victim_falls_back_to_am_lru():
+    """Tests that Am evicts its least recently used entry."""
+    cache = TwoQueueCache(4, a1_ratio=0.25)
+    for key in ("a", "b", "c"):
+        cache[key] = 0
+        cache.hit(key)
+    cache.hit("a")
+
+    assert not cache.a1
+    assert cache.victim() == "b"
+
+
+def test_ghost_entry_returns_straight_to_am():
+    """Tests that a key evicted from A1 is admitted to Am when it comes back."""
+    cache = TwoQueueCache(4)
+    cache["a"] = 1
+    assert cache.pop("a") == 1
+    assert "a" in cache.a1_out
+
+    cache["a"] = 2
+    assert "a" in cache.am
+    assert "a" not in cache.a1_out
+
+
+def test_overflow_only_above_capacity():
+    """Tests that overflow reports a victim only when the cache is over capacity."""
+    cache = TwoQueueCache(2)
+    cache["a"] = 0
+    cache["b"] = 0
+    assert cache.overflow() is None
+    cache["c"] = 0
+    assert cache.overflow() == "a"
+
+
+def test_overflow_skips_pinned_entries_across_shards():
+    """Tests that pinned values are never chosen while other entries can leave."""
+    cache = ShardedCache(2, shards=2)
+    for key in range(6):
+        cache[key] = "pinned" if key % 2 else "free"
+
+    victims = []
+    while (victim := cache.overflow(lambda value: value == "pinned")) is not None:
+        victims.append(victim)
+        cache.pop(victim)
+
+    assert sorted(victims) == [0, 2, 4]
+    assert sorted(cache) == [1, 3, 5]
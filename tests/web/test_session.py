@@ -0,0 +1,25 @@
+import orjson
+
+from app.web.session_manager import Session
+
+
+def test_message_ids_are_unique_across_sessions_sharing_a_prefix():
+    """Tests that message ids do not collide when session ids share a prefix."""
+    first = Session("abcdef01" + "0" * 24)
+    second = Session("abcdef01" + "1" * 24)
+
+    ids = {first.add_message("user", "a").id, second.add_message("user", "b").id}
+    ids.add(first.add_thinking_step("passo")["id"])
+    assert len(ids) == 3
+
+
+def test_ids_continue_after_reload():
+    """Tests that the counter resumes past the ids of a loaded session."""
+    session = Session()
+    session.add_message("user", "um")
+    session.add_thinking_step("dois")
+
+    reloaded = Session.from_dict(orjson.loads(orjson.dumps(session.to_dict())))
+    new_id = reloaded.add_message("assistant", "três").id
+    assert new_id not in {m.id for m in session.messages}
+    assert new_id != session.thinking_steps[0]["id"]
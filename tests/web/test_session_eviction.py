@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.web.session_manager import Session
+
+
+async def _forever():
+    await asyncio.sleep(3600)
+
+
+@pytest.mark.asyncio
+async def test_eviction_skips_session_with_running_task(make_manager):
+    """Tests that capacity eviction never cancels a running agent."""
+    manager = make_manager(max_sessions=2)
+    busy = manager.create_session()
+    task = manager.start_task(busy, _forever())
+
+    for _ in range(3):
+        manager.create_session()
+    await asyncio.sleep(0)
+
+    assert busy.id in manager.sessions
+    assert not task.cancelled()
+    assert len(manager.sessions) == 2
+    await manager.cancel_task(busy)
+
+
+@pytest.mark.asyncio
+async def test_eviction_skips_session_with_websocket(make_manager):
+    """Tests that capacity eviction keeps sessions with connected clients."""
+    manager = make_manager(max_sessions=2)
+    watched = manager.create_session()
+    watched.websockets.append(object())
+
+    for _ in range(3):
+        manager.create_session()
+
+    assert watched.id in manager.sessions
+    assert watched.websockets
+
+
+def test_cache_may_exceed_capacity_when_all_sessions_are_busy(make_manager):
+    """Tests that eviction stops instead of looping when nothing can leave."""
+    manager = make_manager(max_sessions=1)
+    first = manager.create_session()
+    first.websockets.append(object())
+
+    second = Session()
+    second.websockets.append(object())
+    manager._add_session(second)
+    manager._evict_overflow()
+
+    assert first.id in manager.sessions
+    assert second.id in manager.sessions
+    assert len(manager.sessions) == 2
+
+    idle = manager.create_session()
+    assert idle.id not in manager.sessions
+    assert len(manager.sessions) == 2
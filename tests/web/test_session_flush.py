@@ -0,0 +1,63 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+
+async def _settle(manager):
+    """Waits for the flusher to pick up and write the pending records."""
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+        if not manager._wal_buffer:
+            return
+
+
+@pytest.mark.asyncio
+async def test_flusher_survives_failed_unlink(make_manager, monkeypatch):
+    """Tests that an I/O error during compaction does not stop the flusher."""
+    manager = make_manager(flush_interval=0, compact_every=1)
+    manager.start()
+    session = manager.create_session()
+    await _settle(manager)
+
+    unlink = Path.unlink
+
+    def failing_unlink(path, missing_ok=False):
+        if path.suffix == ".json":
+            raise PermissionError("arquivo em uso")
+        unlink(path, missing_ok=missing_ok)
+
+    monkeypatch.setattr(Path, "unlink", failing_unlink)
+    manager.delete_session(session.id)
+    await _settle(manager)
+    assert not manager._flusher.done()
+    assert session.id in manager._failed_deletes
+    # The delete record stays in the log until the snapshot is gone
+    assert b'"delete"' in manager.wal_path.read_bytes()
+
+    other = manager.create_session()
+    await _settle(manager)
+    assert not manager._wal_buffer
+    assert other.id.encode() in manager.wal_path.read_bytes()
+
+    monkeypatch.setattr(Path, "unlink", unlink)
+    await manager.flush(compact=True)
+    assert not manager._failed_deletes
+    assert not (manager.sessions_dir / f"{session.id}.json").exists()
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_closes_log(make_manager):
+    """Tests that stop flushes and closes the write-ahead log and its lock."""
+    manager = make_manager()
+    manager.start()
+    session = manager.create_session()
+    session.add_message("user", "até logo")
+    manager.update_session(session)
+
+    wal = manager._wal
+    await manager.stop()
+    assert wal.closed
+    assert manager._wal is None and manager._wal_lock is None
+    assert (manager.sessions_dir / f"{session.id}.json").exists()
@@ -0,0 +1,56 @@
+def test_evicted_sessions_stay_listed_and_counted(make_manager):
+    """Tests that listing and stats cover sessions evicted from memory."""
+    manager = make_manager(max_sessions=2)
+    for i in range(5):
+        session = manager.create_session()
+        session.add_message("user", f"mensagem {i}")
+        manager.update_session(session)
+
+    assert len(manager.sessions) == 2
+    stats = manager.get_session_stats()
+    assert stats["total_sessions"] == 5
+    assert stats["total_messages"] == 5
+    assert [s["preview"] for s in manager.list_sessions()] == [
+        f"mensagem {i}" for i in reversed(range(5))
+    ]
+
+
+def test_delete_evicted_session_removes_file(make_manager):
+    """Tests that deleting a session that is only on disk removes it everywhere."""
+    manager = make_manager(max_sessions=1)
+    first = manager.create_session()
+    first.add_message("user", "antiga")
+    manager.update_session(first)
+    manager.create_session()
+    manager._flush_sync(compact=True)
+    assert first.id not in manager.sessions
+
+    assert manager.delete_session(first.id)
+    assert not (manager.sessions_dir / f"{first.id}.json").exists()
+    assert manager.get_session_stats()["total_sessions"] == 1
+    assert manager.search_sessions("antiga") == []
+    assert not manager.delete_session(first.id)
+
+
+def test_cleanup_removes_evicted_sessions(make_manager):
+    """Tests that cleanup of old sessions also covers those not in memory."""
+    manager = make_manager(max_sessions=1)
+    for _ in range(3):
+        manager.create_session()
+    manager._flush_sync(compact=True)
+
+    assert manager.cleanup_old_sessions(days=-1) == 3
+    assert manager.get_session_stats()["total_sessions"] == 0
+    assert not list(manager.sessions_dir.glob("*.json"))
+
+
+def test_delete_session_known_only_on_disk(make_manager):
+    """Tests deleting a session another worker created after this one started."""
+    reader = make_manager(pid=2000)
+    owner = make_manager(pid=1000)
+    session = owner.create_session()
+    owner._flush_sync(compact=True)
+    assert session.id not in reader._summaries
+
+    assert reader.delete_session(session.id)
+    assert not (reader.sessions_dir / f"{session.id}.json").exists()
@@ -0,0 +1,39 @@
+def _contents(session):
+    return [message.content for message in session.messages]
+
+
+def test_evicted_session_reloads_from_disk(make_manager):
+    """Tests that a session evicted from the cache comes back on access."""
+    manager = make_manager(max_sessions=4)
+    first = manager.create_session()
+    first.add_message("user", "volta do disco")
+    manager.update_session(first)
+    # Which entry leaves depends on the shards, so fill until it is evicted
+    created = 1
+    while first.id in manager.sessions:
+        manager.create_session()
+        created += 1
+    manager._flush_sync(compact=True)
+
+    reloaded = manager.get_session(first.id)
+    assert reloaded is not first
+    assert _contents(reloaded) == ["volta do disco"]
+    assert len(manager.sessions) == 4
+    assert manager.get_session_stats()["total_sessions"] == created
+
+
+def test_non_persistent_eviction_forgets_sessions(make_manager):
+    """Tests that without persistence evicted sessions leave listing and stats."""
+    manager = make_manager(persist=False, max_sessions=2)
+    for i in range(4):
+        session = manager.create_session()
+        session.add_message("user", f"efêmera {i}")
+        manager.update_session(session)
+
+    listed = manager.list_sessions()
+    assert len(listed) == 2
+    assert all(manager.get_session(s["id"]) is not None for s in listed)
+    stats = manager.get_session_stats()
+    assert stats["total_sessions"] == 2
+    assert stats["total_messages"] == 2
+    assert len(manager.search_sessions("efêmera")) == 2
@@ -0,0 +1,67 @@
+from app.web import session_manager
+
+
+def test_search_matches_substring_scan(make_manager, monkeypatch):
+    """Tests that indexed search returns the same sessions as a full scan."""
+    monkeypatch.setattr(session_manager, "SEARCH_INDEX_CHARS", 20)
+    manager = make_manager(max_sessions=3)
+    texts = [
+        "Olá mundo",
+        "hello world",
+        "relatório de vendas_2024",
+        "um texto bem mais longo que o limite com agulha no final",
+        "Python e agentes",
+    ]
+    contents = {}
+    for text in texts:
+        session = manager.create_session()
+        session.add_message("user", text)
+        manager.update_session(session)
+        contents[session.id] = text
+
+    def scan(query):
+        return {
+            session_id for session_id, text in contents.items()
+            if query.lower() in text.lower()
+        }
+
+    queries = ["mundo", "MUNDO", "ello wor", "vendas_20", "agulha", "ython", "o", "-", "ausente"]
+    for query in queries:
+        expected = scan(query)
+        found = {result["id"] for result in manager.search_sessions(query)}
+        assert found == expected, query
+
+
+def test_multi_token_query_matches_word_edges(make_manager):
+    """Tests that the edge tokens of a query match word suffixes and prefixes."""
+    manager = make_manager()
+    session = manager.create_session()
+    session.add_message("user", "configuração do servidor principal")
+    manager.update_session(session)
+    other = manager.create_session()
+    other.add_message("user", "servidor do configurador")
+    manager.update_session(other)
+
+    found = {result["id"] for result in manager.search_sessions("ção do servid")}
+    assert found == {session.id}
+    found = {result["id"] for result in manager.search_sessions("do serv")}
+    assert found == {session.id}
+
+
+def test_deleting_sessions_empties_the_vocabulary(make_manager):
+    """Tests that the token index and vocabulary shrink back when sessions go."""
+    manager = make_manager()
+    ids = []
+    for text in ("alfa beta", "beta gama", "gama delta"):
+        session = manager.create_session()
+        session.add_message("user", text)
+        manager.update_session(session)
+        ids.append(session.id)
+
+    assert list(manager._vocab) == ["alfa", "beta", "delta", "gama"]
+    manager.delete_session(ids[0])
+    assert "alfa" not in manager._vocab
+    for session_id in ids[1:]:
+        manager.delete_session(session_id)
+    assert not manager._tokens
+    assert not manager._vocab and not manager._vocab_reversed
@@ -0,0 +1,168 @@
+from app.web.session_manager import SessionManager
+
+from conftest import crash
+
+
+def _contents(session):
+    return [message.content for message in session.messages]
+
+
+def test_wal_replay_restores_unflushed_messages(make_manager):
+    """Tests that a restart rebuilds sessions from the log alone."""
+    manager = make_manager()
+    session = manager.create_session()
+    session.add_message("user", "olá")
+    session.add_message("assistant", "oi")
+    manager.update_session(session)
+    crash(manager)
+
+    restored = make_manager().get_session(session.id)
+    assert restored is not None
+    assert _contents(restored) == ["olá", "oi"]
+
+
+def test_wal_replay_is_idempotent(make_manager):
+    """Tests that replaying a log already contained in the snapshot adds nothing."""
+    manager = make_manager()
+    session = manager.create_session()
+    session.add_message("user", "primeira")
+    session.add_message("assistant", "segunda")
+    session.add_thinking_step("pensando")
+    manager.update_session(session)
+    log = manager.wal_path.read_bytes()
+
+    # Snapshot written but the worker dies before truncating the log
+    manager._flush_sync(compact=True)
+    manager.wal_path.write_bytes(log)
+    crash(manager)
+
+    restored = make_manager().get_session(session.id)
+    assert _contents(restored) == ["primeira", "segunda"]
+    assert len(restored.thinking_steps) == 1
+
+    # A second restart over the compacted state changes nothing either
+    again = make_manager().get_session(session.id)
+    assert _contents(again) == ["primeira", "segunda"]
+
+
+def test_delete_then_replay_keeps_session_deleted(make_manager):
+    """Tests that a delete recorded in the log wins over earlier records."""
+    manager = make_manager()
+    session = manager.create_session()
+    session.add_message("user", "apagar")
+    manager.update_session(session)
+    manager._flush_sync(compact=True)
+    assert (manager.sessions_dir / f"{session.id}.json").exists()
+
+    assert manager.delete_session(session.id)
+    crash(manager)
+
+    restored = make_manager()
+    assert restored.get_session(session.id) is None
+    assert not (restored.sessions_dir / f"{session.id}.json").exists()
+
+
+def test_compaction_keeps_other_workers_records(make_manager):
+    """Tests that one worker compacting its log does not drop another's records."""
+    worker_a = make_manager(pid=1001)
+    worker_b = make_manager(pid=1002)
+    assert worker_a.wal_path != worker_b.wal_path
+
+    session_a = worker_a.create_session()
+    session_a.add_message("user", "do worker A")
+    worker_a.update_session(session_a)
+    session_b = worker_b.create_session()
+    session_b.add_message("user", "do worker B")
+    worker_b.update_session(session_b)
+
+    worker_a._flush_sync(compact=True)
+
+    restarted = make_manager(pid=1003)
+    assert _contents(restarted.get_session(session_a.id)) == ["do worker A"]
+    assert _contents(restarted.get_session(session_b.id)) == ["do worker B"]
+
+
+
+
+def test_stale_log_does_not_roll_back_newer_snapshot(make_manager):
+    """Tests that records already folded into a newer snapshot are skipped."""
+    first = make_manager(pid=1000)
+    session = first.create_session()
+    session.add_message("user", "m1")
+    first.update_session(session)
+
+    # Another worker replays the log, continues the session and compacts
+    # while the first one still holds its log
+    second = make_manager(pid=2000)
+    continued = second.get_session(session.id)
+    continued.add_message("assistant", "m2")
+    continued.set_status("completed")
+    second.update_session(continued)
+    second._flush_sync(compact=True)
+    assert first.wal_path.exists()
+
+    restored = make_manager(pid=3000).get_session(session.id)
+    assert _contents(restored) == ["m1", "m2"]
+    assert restored.status == "completed"
+
+
+def test_put_never_replaces_known_session(make_manager):
+    """Tests that a creation record is ignored once the session exists."""
+    manager = make_manager()
+    session = manager.create_session()
+    put_record = manager.wal_path.read_bytes()
+    session.add_message("user", "depois da criação")
+    manager.update_session(session)
+    manager._flush_sync(compact=True)
+
+    # A log that only holds the original creation record
+    manager.wal_path.write_bytes(put_record)
+    crash(manager)
+
+    restored = make_manager().get_session(session.id)
+    assert _contents(restored) == ["depois da criação"]
+
+
+def test_dead_worker_log_is_replayed_and_removed(make_manager):
+    """Tests that a crashed worker's log becomes snapshots and is deleted."""
+    dead = make_manager(pid=1001)
+    session = dead.create_session()
+    session.add_message("user", "antes da queda")
+    dead.update_session(session)
+    crash(dead)
+    assert not (dead.sessions_dir / f"{session.id}.json").exists()
+
+    survivor = make_manager(pid=1002)
+    assert _contents(survivor.get_session(session.id)) == ["antes da queda"]
+    assert (survivor.sessions_dir / f"{session.id}.json").exists()
+    assert not dead.wal_path.exists()
+    assert not dead.wal_path.with_suffix(".lock").exists()
+
+
+def test_live_worker_log_is_kept(make_manager):
+    """Tests that the log of a running worker survives another worker's startup."""
+    alive = make_manager(pid=1001)
+    session = alive.create_session()
+    session.add_message("user", "ainda rodando")
+    alive.update_session(session)
+
+    assert SessionManager._worker_alive(alive.wal_path)
+    make_manager(pid=1002)
+    assert alive.wal_path.read_bytes()
+
+    crash(alive)
+    assert not SessionManager._worker_alive(alive.wal_path)
+
+
+def test_dead_log_kept_when_snapshot_fails(make_manager, monkeypatch):
+    """Tests that a dead log is not deleted while its snapshots are unwritten."""
+    dead = make_manager(pid=1001)
+    session = dead.create_session()
+    session.add_message("user", "sem snapshot")
+    dead.update_session(session)
+    crash(dead)
+
+    monkeypatch.setattr(SessionManager, "_write_session_file", lambda self, sid, data: False)
+    survivor = make_manager(pid=1002)
+    assert session.id in survivor._failed_snapshots
+    assert dead.wal_path.read_bytes()
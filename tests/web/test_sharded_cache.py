@@ -0,0 +1,40 @@
+import pytest
+
+from app.web.cache import ShardedCache
+
+
+@pytest.mark.parametrize("capacity", [1, 2, 10, 100])
+def test_sharded_cache_enforces_global_capacity(capacity):
+    """Tests that the total number of entries never exceeds capacity."""
+    cache = ShardedCache(capacity, shards=16)
+    for key in range(capacity * 20):
+        cache[f"session-{key}"] = key
+        while (victim := cache.overflow()) is not None:
+            cache.pop(victim)
+        assert len(cache) <= capacity
+    assert len(cache) == capacity
+
+
+def test_sharded_cache_routes_keys_to_one_shard():
+    """Tests lookup, hit and pop through the owning shard."""
+    cache = ShardedCache(64, shards=4)
+    cache["a"] = 1
+    assert "a" in cache
+    assert cache.get("a") == 1
+    cache.hit("a")
+    assert sum("a" in shard.am for shard in cache.shards) == 1
+    assert cache.pop("a") == 1
+    assert "a" not in cache
+
+
+def test_sharded_cache_evicts_from_fullest_shard():
+    """Tests that the victim comes from the shard holding the most entries."""
+    cache = ShardedCache(4, shards=2)
+    full, other = cache.shards
+    keys = [key for key in range(100) if cache._shard(key) is full][:4]
+    spare = next(key for key in range(100) if cache._shard(key) is other)
+    for key in keys:
+        cache[key] = key
+    cache[spare] = spare
+
+    assert cache.overflow() == keys[0]
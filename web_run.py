@@ -51,6 +51,10 @@ def main():
         port=args.port,
         reload=args.reload,
         workers=args.workers,
+        # uvloop não está disponível no Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
         log_level="info"
     )
 